@@ -12,12 +12,17 @@ from .skyline import SkylineMwf, SkylineMwfl, SkylineBl, \
     SkylineBlWm, SkylineMwfWm, SkylineMwflWm
 
 from .packer import SORT_AREA, SORT_PERI, SORT_DIFF, SORT_SSIDE, \
-    SORT_LSIDE, SORT_RATIO, SORT_NONE
+    SORT_LSIDE, SORT_RATIO, SORT_NONE, PARTITION_ROUND_ROBIN, \
+    PARTITION_SIZE_CLASS
  
 from .packer import PackerBNF, PackerBFF, PackerBBF, PackerOnlineBNF, \
     PackerOnlineBFF, PackerOnlineBBF, PackerGlobal, newPacker, \
     PackingMode, PackingBin, float2dec
 
+from .portfolio import pack_best, candidate_product
+
+from .threaded import PackerConcurrentBFF, PackerConcurrentBBF
+
 
 
 
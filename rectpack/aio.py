@@ -0,0 +1,134 @@
+from .packer import PackerOnline
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+
+def _run_batch(packer, batch):
+    """
+    Call the packer methods in the batch in order, runs in the executor.
+
+    Returns:
+        list: (result, exception) tuple for each call
+    """
+    results = []
+    for method, args, kwargs in batch:
+        try:
+            results.append((getattr(packer, method)(*args, **kwargs), None))
+        except Exception as e:
+            results.append((None, e))
+    return results
+
+
+class AsyncPacker(object):
+    """
+    asyncio front-end for online packers. The rectangles added during a
+    short window are packed together in an executor thread, so the event
+    loop isn't blocked while they are placed.
+
+    Requires Python 3.5 or later, it isn't imported by the rectpack package
+    so it must be imported from rectpack.aio.
+    """
+
+    def __init__(self, packer, window=0.001, executor=None):
+        """
+        Arguments:
+            packer (PackerOnline): Online packer, it shouldn't be accessed
+                directly while there are calls pending.
+            window (float): Seconds rectangles are collected before packing
+                them together.
+            executor (concurrent.futures.Executor): Thread executor used to
+                pack the batches, by default a single thread executor is
+                created. Batches are packed one at a time in the order they
+                were collected.
+        """
+        if not isinstance(packer, PackerOnline) or hasattr(packer, 'pack'):
+            raise AttributeError("Only online packers are supported")
+        # All the batches modify the same packer, it can't be copied
+        # into other processes.
+        if isinstance(executor, ProcessPoolExecutor):
+            raise AttributeError("Process executors aren't supported")
+
+        self._packer = packer
+        self._window = window
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1)
+
+        self._pending = []   # (method, args, kwargs, future) not packed
+        self._timer = None   # Scheduled _flush call
+        self._last = None    # Last batch task
+
+    @property
+    def packer(self):
+        return self._packer
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _call(self, method, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._pending.append((method, args, kwargs, future))
+        if self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush)
+        return future
+
+    def _flush(self):
+        """Start packing the pending calls"""
+        self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._last = asyncio.ensure_future(self._run(batch, self._last))
+
+    async def _run(self, batch, previous):
+        if previous is not None:
+            await asyncio.wait([previous])
+
+        loop = asyncio.get_event_loop()
+        calls = [(method, args, kwargs) for method, args, kwargs, _ in batch]
+        try:
+            results = await loop.run_in_executor(self._executor, _run_batch,
+                    self._packer, calls)
+        except Exception as e:
+            results = [(None, e)]*len(batch)
+
+        for (_, _, _, future), (result, exception) in zip(batch, results):
+            if future.done():
+                continue # Cancelled
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+    async def add_rect(self, width, height, rid=None):
+        """
+        Pack rectangle, it is packed with the other rectangles added in
+        the same window in the order they were added.
+
+        Returns:
+            tuple: (bin, Rectangle) where bin is the PackingAlgorithm
+                instance where the rectangle was placed
+            None: The rectangle couldn't be packed
+        """
+        return await self._call('_add_rect', width, height, rid)
+
+    async def add_bin(self, width, height, count=1, **kwargs):
+        """Add bin to the packer, after the pending rectangles are packed"""
+        return await self._call('add_bin', width, height, count, **kwargs)
+
+    async def close(self):
+        """
+        Pack the pending rectangles, wait until all are packed, and shut
+        down the executor if it was created by the packer.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._flush()
+        if self._last is not None:
+            await asyncio.wait([self._last])
+        if self._own_executor:
+            self._executor.shutdown()
@@ -1,9 +1,49 @@
 import heapq # heapq.heappush, heapq.heappop
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from .packer import newPacker, PackingMode, PackingBin, SORT_LSIDE
 from .skyline import SkylineBlWm
 
 
 
+def _refine_container(pack_algo, rotation, rectangles, width, height, 
+        max_area=None):
+    """
+    Use bottom-left packing algorithm to find a lower height for the 
+    container, runs in the executor when candidates are refined in parallel.
+    The rectangles are placed in the same order as packing them with
+    Enclose._new_packer, so the result is the same.
+
+    Arguments:
+        pack_algo: Packing algorithm class
+        rotation (boolean): Enable/Disable rectangle rotation.
+        rectangles (list): Rectangles to enclose
+        width
+        height
+        max_area: Stop packing as soon as the container area is larger,
+            the candidate can't improve a container already found.
+
+    Returns:
+        tuple (width, height): Refined container
+        None: Not all the rectangles could be packed, or the area is
+            larger than max_area.
+    """
+    container = pack_algo(width, height, rot=rotation)
+
+    # Track the highest rectangle
+    new_height = 0
+    for r in SORT_LSIDE(rectangles):
+        rect = container.add_rect(*r)
+        if rect is None:
+            return None
+        if rect.top > new_height:
+            new_height = rect.top
+            if max_area is not None and width*new_height > max_area:
+                return None
+
+    return(width, new_height)
+
+
 class Enclose(object):
 
     def __init__(self, rectangles=[], max_width=None, max_height=None, rotation=True):
@@ -86,17 +126,33 @@ class Enclose(object):
         min_area = sum(r[0]*r[1] for r in self._rectangles)
         return [(c, max_height) for c in candidates if c*max_height>=min_area]
    
-    def _refine_candidate(self, width, height):
+    def _lower_bound(self, width):
         """
-        Use bottom-left packing algorithm to find a lower height for the 
-        container.
+        Lower bound for the area of a container of the given width, the 
+        total area of the rectangles, or the width times the height of the
+        tallest rectangle placed as flat as the width allows.
 
         Arguments:
             width
-            height
 
         Returns:
-            tuple (width, height, PackingAlgorithm):
+            number: Minimum container area
+        """
+        min_area = sum(r[0]*r[1] for r in self._rectangles)
+        if self._rotation:
+            min_height = max(min(r) if max(r) <= width else max(r)
+                    for r in self._rectangles)
+        else:
+            min_height = max(r[1] for r in self._rectangles)
+        return max(min_area, width*min_height)
+
+    def _new_packer(self, width, height):
+        """
+        Pack all the rectangles into a container with the default packing
+        algorithm.
+
+        Returns:
+            Packer: Packer with a single bin
         """
         packer = newPacker(PackingMode.Offline, PackingBin.BFF, 
                 pack_algo=self._pack_algo, sort_algo=SORT_LSIDE,
@@ -107,30 +163,136 @@ class Enclose(object):
             packer.add_rect(*r)
 
         packer.pack()
+        return packer
 
-        # Check all rectangles where packed
-        if len(packer[0]) != len(self._rectangles):
-            return None
+    def _refine_candidate(self, width, height, max_area=None):
+        """
+        Use bottom-left packing algorithm to find a lower height for the 
+        container (see _refine_container).
+
+        Returns:
+            tuple (width, height): Refined container
+            None: Not all the rectangles could be packed, or the area is
+                larger than max_area.
+        """
+        return _refine_container(self._pack_algo, self._rotation,
+                self._rectangles, width, height, max_area)
 
-        # Find highest rectangle
-        new_height = max(packer[0], key=lambda x: x.top).top
-        return(width, new_height, packer)
+    @staticmethod
+    def _is_pruned(best, bound, index):
+        """Test if a candidate can't improve the best container"""
+        return best is not None and (bound, index) > best[:2]
 
-    def generate(self):
-    
+    @staticmethod
+    def _update_best(best, index, container):
+        """
+        Return the container with the smaller area, or the one with the
+        lowest candidate index if there is a tie. The result doesn't depend
+        on the order the candidates are refined.
+
+        Arguments:
+            best (tuple): Best container (area, index, width, height) or None
+            index (int): Candidate index
+            container (tuple): Refined container (width, height) or None
+        """
+        if container is None:
+            return best
+        width, height = container
+        if best is None or (width*height, index) < best[:2]:
+            return (width*height, index, width, height)
+        return best
+
+    def _refine_sequential(self, candidates, bounds, order):
+        best = None
+        for i in order:
+            if self._is_pruned(best, bounds[i], i):
+                continue
+            container = self._refine_candidate(*candidates[i],
+                    max_area=best[0] if best else None)
+            best = self._update_best(best, i, container)
+        return best
+
+    def _refine_parallel(self, candidates, bounds, order, max_workers, 
+            executor):
+        """
+        Refine up to max_workers candidates at once in the executor, each
+        one is submitted with the best area found when it is started.
+        """
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        workers = max_workers or os.cpu_count() or 1
+
+        order = iter(order)
+        pending = {} # future -> candidate index
+        best = None
+        try:
+            while True:
+                for i in order:
+                    if self._is_pruned(best, bounds[i], i):
+                        continue
+                    future = executor.submit(_refine_container, 
+                            self._pack_algo, self._rotation, self._rectangles,
+                            *candidates[i], max_area=best[0] if best else None)
+                    pending[future] = i
+                    if len(pending) >= workers:
+                        break
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    best = self._update_best(best, pending.pop(future),
+                            future.result())
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+        return best
+
+    def generate(self, max_workers=None, executor=None):
+        """
+        Find the container with the smallest area enclosing all the 
+        rectangles.
+
+        Arguments:
+            max_workers (int): Refine this many container candidates at once
+                in a process pool, by default the number of processors when
+                an executor is provided.
+            executor (concurrent.futures.Executor): Refine the candidates in
+                this executor, it isn't shut down afterwards. When neither
+                max_workers nor executor are provided the candidates are
+                refined in the calling thread.
+
+        Returns:
+            Packer: Packer with a single bin of the size of the container
+            None: No container was found
+        """
         # Generate initial containers
         candidates = self._container_candidates()
         if not candidates:
             return None
 
-        # Refine candidates and return the one with the smaller area
-        containers = [self._refine_candidate(*c) for c in candidates]
-        containers = [c for c in containers if c]
-        if not containers:
-            return None
+        # Refine the candidates with the lowest area bound first, and from 
+        # them the ones closer to a square, so a good container is found 
+        # early and the rest can be discarded as soon as they are worse.
+        min_area = sum(r[0]*r[1] for r in self._rectangles)
+        bounds = [self._lower_bound(c[0]) for c in candidates]
+        order = sorted(range(len(candidates)), key=lambda i: (bounds[i],
+            abs(candidates[i][0]*candidates[i][0]-min_area), i))
 
-        width, height, packer = min(containers, key=lambda x: x[0]*x[1])
+        # Find the container with the smaller area, or the first candidate
+        # if there is a tie (area, index, width, height)
+        if max_workers is None and executor is None:
+            best = self._refine_sequential(candidates, bounds, order)
+        else:
+            best = self._refine_parallel(candidates, bounds, order, 
+                    max_workers, executor)
+        if best is None:
+            return None
 
+        _, i, width, height = best
+        packer = self._new_packer(*candidates[i])
         packer.width = width
         packer.height = height
         return packer
@@ -262,13 +262,15 @@ class Rectangle(object):
         Returns:
             bool: True if the rectangles intersect, False otherwise
         """
+        # Edges are computed inline, this is one of the hottest paths and
+        # going through the properties is several times slower.
         if edges:
-            if (self.bottom > rect.top or self.top < rect.bottom or\
-                self.left > rect.right or self.right < rect.left):
+            if (self.y > rect.y+rect.height or self.y+self.height < rect.y or\
+                self.x > rect.x+rect.width or self.x+self.width < rect.x):
                 return False
         else:
-            if (self.bottom >= rect.top or self.top <= rect.bottom or
-                self.left >= rect.right or self.right <= rect.left):
+            if (self.y >= rect.y+rect.height or self.y+self.height <= rect.y or
+                self.x >= rect.x+rect.width or self.x+self.width <= rect.x):
                 return False
 
         return True
@@ -293,10 +295,10 @@ class Rectangle(object):
         if not self.intersects(rect, edges=edges):
             return None
         
-        bottom = max(self.bottom, rect.bottom)
-        left = max(self.left, rect.left)
-        top = min(self.top, rect.top)
-        right = min(self.right, rect.right)
+        bottom = max(self.y, rect.y)
+        left = max(self.x, rect.x)
+        top = min(self.y+self.height, rect.y+rect.height)
+        right = min(self.x+self.width, rect.x+rect.width)
 
         return Rectangle(left, bottom, right-left, top-bottom)
 
@@ -325,17 +327,17 @@ class Rectangle(object):
             return False
 
         # Other rectangle is Up/Down from this
-        if  self.left == other.left and self.width == other.width:
-            y_min = min(self.bottom, other.bottom)
-            y_max = max(self.top, other.top)  
+        if  self.x == other.x and self.width == other.width:
+            y_min = min(self.y, other.y)
+            y_max = max(self.y+self.height, other.y+other.height)  
             self.y = y_min
             self.height = y_max-y_min
             return True
 
         # Other rectangle is Right/Left from this
-        if  self.bottom == other.bottom and self.height == other.height:
-            x_min = min(self.left, other.left)
-            x_max = max(self.right, other.right)
+        if  self.y == other.y and self.height == other.height:
+            x_min = min(self.x, other.x)
+            x_max = max(self.x+self.width, other.x+other.width)
             self.x = x_min
             self.width = x_max-x_min
             return True
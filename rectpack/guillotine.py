@@ -1,7 +1,6 @@
 from .pack_algo import PackingAlgorithm
 from .geometry import Rectangle
-import itertools
-import operator
+from .index import SectionIndex
 
 
 class Guillotine(PackingAlgorithm):
@@ -19,7 +18,16 @@ class Guillotine(PackingAlgorithm):
         """
         self._merge = merge
         super(Guillotine, self).__init__(width, height, rot, *args, **kwargs)
-        
+
+    @property
+    def _sections(self):
+        """List of free sections in the order they are evaluated"""
+        return list(self._free)
+
+    @_sections.setter
+    def _sections(self, sections):
+        self._free = SectionIndex(sections)
+        self._free_space_changed()
 
     def _add_section(self, section):
         """Adds a new section to the free section list, but before that and if 
@@ -28,16 +36,32 @@ class Guillotine(PackingAlgorithm):
         remaining sections until the operation fails. The result is then 
         appended to the list.
 
+        Free sections never overlap, so only the sections sharing a full 
+        edge with the new section can be joined, and they are obtained from
+        the free section index. They are joined in the same order as 
+        checking all sections in repeated passes over the list.
+
         Arguments:
             section (Rectangle): New free section.
         """
         section.rid = 0     
-        plen = 0
-
-        while self._merge and self._sections and plen != len(self._sections):
-            plen = len(self._sections)
-            self._sections = [s for s in self._sections if not section.join(s)]
-        self._sections.append(section)
+        self._free_space_changed()
+
+        # Key of the last section joined in the current pass
+        cursor = -1
+        joined = False
+        while self._merge:
+            for key, s in self._free.adjacent(section):
+                if key > cursor and section.join(s):
+                    self._free.remove(s)
+                    cursor, joined = key, True
+                    break
+            else:
+                if not joined:
+                    break
+                # Start a new pass from the first section
+                cursor, joined = -1, False
+        self._free.append(section)
 
 
     def _split_horizontal(self, section, width, height):
@@ -129,12 +153,30 @@ class Guillotine(PackingAlgorithm):
         """
         raise NotImplementedError
 
+    def _best_section(self, width, height):
+        """Returns the (fitness, section) tuple for the free section with the
+        minimal fitness value, or None if the rectangle doesn't fit in any.
+        When several sections have the same fitness the first one in the 
+        free section list is selected.
+
+        The selection criteria subclasses override it to query the free 
+        section index instead of calling _section_fitness for each section.
+
+        Arguments:
+            width (int, float): Rectangle width
+            height (int, float): Rectangle height
+        """
+        best = None
+        for s in self._free:
+            fit = self._section_fitness(s, width, height)
+            if fit is not None and (best is None or fit < best[0]):
+                best = (fit, s)
+        return best
+
     def _select_fittest_section(self, w, h):
-        """Calls _section_fitness for each of the sections in free section 
-        list. Returns the section with the minimal fitness value, all the rest 
-        is boilerplate to make the fitness comparison, to rotatate the rectangles,
-        and to take into account when _section_fitness returns None because 
-        the rectangle couldn't be placed.
+        """Returns the section with the minimal fitness value, trying the
+        rectangle rotated when rotation is enabled. The rotated rectangle 
+        is only selected when its fitness is strictly better.
 
         Arguments:
             w (int, float): Rectangle width
@@ -145,22 +187,15 @@ class Guillotine(PackingAlgorithm):
                 section (Rectangle): Section with best fitness
                 was_rotated (bool): The rectangle was rotated 
         """
-        fitn = ((self._section_fitness(s, w, h), s, False) for s in self._sections 
-                if self._section_fitness(s, w, h) is not None)
-        fitr = ((self._section_fitness(s, h, w), s, True) for s in self._sections 
-                if self._section_fitness(s, h, w) is not None)
-
-        if not self.rot:
-            fitr = []
+        best = self._best_section(w, h)
+        if self.rot:
+            rotated = self._best_section(h, w)
+            if rotated and (best is None or rotated[0] < best[0]):
+                return rotated[1], True
 
-        fit = itertools.chain(fitn, fitr)
-        
-        try:
-            _, sec, rot = min(fit, key=operator.itemgetter(0))
-        except ValueError:
+        if best is None:
             return None, None
-
-        return sec, rot
+        return best[1], False
 
 
     def add_rect(self, width, height, rid=None):     
@@ -178,21 +213,26 @@ class Guillotine(PackingAlgorithm):
         """
         assert(width > 0 and height >0)
 
-        # Obtain the best section to place the rectangle.
-        section, rotated = self._select_fittest_section(width, height)
+        # Obtain the best section to place the rectangle, unless it was
+        # already selected by fitness()
+        try:
+            section, rotated = self._fitness_memo.pop((width, height))
+        except KeyError:
+            section, rotated = self._select_fittest_section(width, height)
         if not section:
             return None
+        self._free_space_changed()
         
         if rotated:
             width, height = height, width
         
         # Remove section, split and store results
-        self._sections.remove(section)
+        self._free.remove(section)
         self._split(section, width, height)
        
         # Store rectangle in the selected position
         rect = Rectangle(section.x, section.y, width, height, rid)
-        self.rectangles.append(rect)
+        self._place(rect, rotated and width != height)
         return rect
 
     def fitness(self, width, height):
@@ -204,7 +244,11 @@ class Guillotine(PackingAlgorithm):
         assert(width > 0 and height > 0)
 
         # Get best fitness section.
-        section, rotated = self._select_fittest_section(width, height)
+        try:
+            section, rotated = self._fitness_memo[(width, height)]
+        except KeyError:
+            section, rotated = self._memoize_selection(width, height,
+                self._select_fittest_section(width, height))
         if not section:
             return None
         
@@ -215,6 +259,9 @@ class Guillotine(PackingAlgorithm):
         else:
             return self._section_fitness(section, width, height)
 
+    def free_regions(self):
+        return [(s.width, s.height) for s in self._free]
+
     def reset(self):
         super(Guillotine, self).reset()
         self._sections = []
@@ -231,6 +278,9 @@ class GuillotineBaf(Guillotine):
             return None
         return section.area()-width*height
 
+    def _best_section(self, width, height):
+        return self._free.best_area_fit(width, height)
+
 
 class GuillotineBlsf(Guillotine):
     """Implements Best Long Side Fit (BLSF) section selection criteria for 
@@ -241,6 +291,9 @@ class GuillotineBlsf(Guillotine):
             return None
         return max(section.width-width, section.height-height)
 
+    def _best_section(self, width, height):
+        return self._free.best_long_side_fit(width, height)
+
 
 class GuillotineBssf(Guillotine):
     """Implements Best Short Side Fit (BSSF) section selection criteria for 
@@ -251,6 +304,9 @@ class GuillotineBssf(Guillotine):
             return None
         return min(section.width-width, section.height-height)
 
+    def _best_section(self, width, height):
+        return self._free.best_short_side_fit(width, height)
+
 
 class GuillotineSas(Guillotine):
     """Implements Short Axis Split (SAS) selection rule for Guillotine 
@@ -0,0 +1,540 @@
+import bisect
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Larger int values could overflow int64 when the fitness is computed, it's
+# the same bound the packer uses for vectorized sort keys.
+_VECTORIZE_MAX_INT = 2**31
+
+
+class RectIndex(object):
+    """Ordered collection of free rectangles used by the packing algorithms.
+
+    Rectangles are kept in a uniform grid covering the packing surface, so
+    intersection queries only visit the rectangles sharing a cell with the
+    query, and in a list sorted by width, so size queries can skip rectangles
+    too narrow to hold the requested one.
+
+    The collection also keeps the same order a plain list would have if
+    rectangles were appended, or replaced in place by the ones resulting of
+    a split. The packing heuristics break ties by that order so it must be
+    preserved to obtain identical packings.
+
+    Rectangles are tracked by identity, they must not be modified while
+    stored in the index.
+    """
+
+    # Max length of the order keys before they are renumbered
+    MAX_KEY_DEPTH = 32
+
+    def __init__(self, width, height, rects=(), grid_size=8):
+        """
+        Arguments:
+            width (int, float): Indexed surface width
+            height (int, float): Indexed surface height
+            rects (list): Initial rectangles in order
+            grid_size (int): Number of grid cells per side
+        """
+        self._width = width
+        self._height = height
+        self._grid_size = grid_size
+
+        self._rects = {}    # id -> Rectangle
+        self._order = {}    # id -> order key (tuple)
+        self._cells = {}    # (cell_x, cell_y) -> set of ids
+        self._widths = []   # Sorted rectangle widths
+        self._wids = []     # ids in the same order as _widths
+        self._next_key = 0
+
+        for r in rects:
+            self.append(r)
+
+    def __len__(self):
+        return len(self._rects)
+
+    def __bool__(self):
+        return bool(self._rects)
+
+    __nonzero__ = __bool__
+
+    def __iter__(self):
+        return iter(self._sorted(self._rects))
+
+    def _sorted(self, ids):
+        """Return the rectangles with the given ids in collection order"""
+        rects = self._rects
+        return [rects[i] for i in sorted(ids, key=self._order.__getitem__)]
+
+    def _cell_range(self, start, end, size):
+        """Return the range of cell indexes covering [start, end]"""
+        n = self._grid_size
+        first = int(start*n//size) if start > 0 else 0
+        last = int(end*n//size) if end < size else n-1
+        return range(min(first, n-1), min(last, n-1)+1)
+
+    def _rect_cells(self, rect):
+        """Generate the keys of all the cells touched by a rectangle"""
+        xcells = self._cell_range(rect.x, rect.x+rect.width, self._width)
+        ycells = self._cell_range(rect.y, rect.y+rect.height, self._height)
+        for cx in xcells:
+            for cy in ycells:
+                yield cx, cy
+
+    def _insert(self, rect, key):
+        rid = id(rect)
+        self._rects[rid] = rect
+        self._order[rid] = key
+
+        cells = self._cells
+        for c in self._rect_cells(rect):
+            try:
+                cells[c].add(rid)
+            except KeyError:
+                cells[c] = {rid}
+
+        i = bisect.bisect_right(self._widths, rect.width)
+        self._widths.insert(i, rect.width)
+        self._wids.insert(i, rid)
+
+    def _renumber(self):
+        """Replace all order keys with short ones keeping the same order"""
+        ids = sorted(self._order, key=self._order.__getitem__)
+        self._order = {rid: (n,) for n, rid in enumerate(ids)}
+        self._next_key = len(ids)
+
+    def append(self, rect):
+        """Add rectangle at the end of the collection"""
+        self._insert(rect, (self._next_key,))
+        self._next_key += 1
+
+    def remove(self, rect):
+        """Remove rectangle from the collection"""
+        rid = id(rect)
+        del self._rects[rid]
+        del self._order[rid]
+
+        cells = self._cells
+        for c in self._rect_cells(rect):
+            cells[c].discard(rid)
+
+        i = bisect.bisect_left(self._widths, rect.width)
+        while self._wids[i] != rid:
+            i += 1
+        del self._widths[i]
+        del self._wids[i]
+
+    def replace(self, rect, new_rects):
+        """Remove a rectangle inserting the new ones at its position.
+
+        Arguments:
+            rect (Rectangle): Rectangle to remove
+            new_rects (list): Rectangles to insert in its place
+        """
+        key = self._order[id(rect)]
+        self.remove(rect)
+
+        for n, r in enumerate(new_rects):
+            self._insert(r, key+(n,))
+
+        if len(key) >= self.MAX_KEY_DEPTH:
+            self._renumber()
+
+    def intersecting(self, rect):
+        """Return all rectangles intersecting rect (touching edges is
+        not considered intersection) in collection order.
+        """
+        cells = self._cells
+        candidates = set()
+        for c in self._rect_cells(rect):
+            s = cells.get(c)
+            if s:
+                candidates.update(s)
+
+        rects = self._rects
+        candidates = [i for i in candidates if rects[i].intersects(rect)]
+        return self._sorted(candidates)
+
+    def containing(self, rect):
+        """Return all the other rectangles in the collection containing rect.
+        A rectangle containing another one shares all its cells, so only the
+        cell holding rect's bottom-left corner needs to be checked.
+        """
+        cx = self._cell_range(rect.x, rect.x, self._width)[0]
+        cy = self._cell_range(rect.y, rect.y, self._height)[0]
+
+        rects = self._rects
+        rid = id(rect)
+        return [rects[i] for i in self._cells.get((cx, cy), ())
+                if i != rid and rects[i].contains(rect)]
+
+    def fitting(self, width, height):
+        """Return all rectangles big enough to contain a rectangle of
+        dimensions width x height in collection order.
+        """
+        rects = self._rects
+        first = bisect.bisect_left(self._widths, width)
+        candidates = [i for i in self._wids[first:]
+                if rects[i].height >= height]
+        return self._sorted(candidates)
+
+
+
+class ArrayRectIndex(RectIndex):
+    """RectIndex also keeping the position and size of the rectangles in
+    numpy arrays, so the fitness of all of them can be evaluated at once.
+
+    Only int and float dimensions are supported, when a rectangle of any
+    other type is inserted the arrays are dropped and vectorized is set
+    to False.
+    """
+
+    def __init__(self, width, height, rects=(), grid_size=8, capacity=64):
+        """
+        Arguments:
+            width (int, float): Indexed surface width
+            height (int, float): Indexed surface height
+            rects (list): Initial rectangles in order
+            grid_size (int): Number of grid cells per side
+            capacity (int): Initial size of the arrays
+        """
+        if type(width) is int and type(height) is int:
+            self._types = (int,)
+            dtype = numpy.int64
+        elif type(width) in (int, float) and type(height) in (int, float):
+            self._types = (int, float)
+            dtype = numpy.float64
+        else:
+            self._types = ()
+            dtype = None
+
+        self.vectorized = numpy is not None and dtype is not None
+        if self.vectorized:
+            self._xs = numpy.zeros(capacity, dtype=dtype)
+            self._ys = numpy.zeros(capacity, dtype=dtype)
+            self._ws = numpy.zeros(capacity, dtype=dtype)
+            self._hs = numpy.zeros(capacity, dtype=dtype)
+            self._alive = numpy.zeros(capacity, dtype=bool)
+        self._slots = {}        # id -> array position
+        self._slot_ids = [None]*capacity
+        self._free_slots = list(reversed(range(capacity)))
+
+        super(ArrayRectIndex, self).__init__(width, height, rects, grid_size)
+
+    def _grow(self):
+        size = len(self._slot_ids)
+        for name in ('_xs', '_ys', '_ws', '_hs', '_alive'):
+            column = getattr(self, name)
+            setattr(self, name, numpy.concatenate((column, numpy.zeros_like(column))))
+        self._slot_ids.extend([None]*size)
+        self._free_slots.extend(reversed(range(size, 2*size)))
+
+    def accepts(self, *values):
+        """Test the values can be used with the vectorized operations"""
+        types = self._types
+        return self.vectorized and all(type(v) in types and
+                (type(v) is not int or abs(v) < _VECTORIZE_MAX_INT)
+                for v in values)
+
+    def _insert(self, rect, key):
+        super(ArrayRectIndex, self)._insert(rect, key)
+        if not self.vectorized:
+            return
+
+        if not self.accepts(rect.x, rect.y, rect.width, rect.height):
+            self.vectorized = False
+            return
+
+        if not self._free_slots:
+            self._grow()
+        
+        slot = self._free_slots.pop()
+        try:
+            self._xs[slot] = rect.x
+            self._ys[slot] = rect.y
+            self._ws[slot] = rect.width
+            self._hs[slot] = rect.height
+        except OverflowError:
+            self.vectorized = False
+            return
+
+        rid = id(rect)
+        self._slots[rid] = slot
+        self._slot_ids[slot] = rid
+        self._alive[slot] = True
+
+    def remove(self, rect):
+        super(ArrayRectIndex, self).remove(rect)
+        if not self.vectorized:
+            return
+
+        slot = self._slots.pop(id(rect))
+        self._alive[slot] = False
+        self._slot_ids[slot] = None
+        self._free_slots.append(slot)
+
+    def best_fit(self, width, height, rot, fitness):
+        """Find the rectangle with the lowest fitness value for placing a 
+        rectangle of dimensions width x height. Ties are broken the same way 
+        as evaluating all rectangles in order, first without rotation and 
+        then rotated, and keeping the first with the lowest value.
+
+        Arguments:
+            width (int, float): Rectangle width
+            height (int, float): Rectangle height
+            rot (bool): Also try the rectangle rotated
+            fitness (callable): fitness(xs, ys, widths, heights, w, h) 
+                returning the array of fitness values
+
+        Returns:
+            (rect, rotated): Best rectangle and whether the rectangle must be 
+                rotated, (None, None) if it doesn't fit anywhere.
+        """
+        best = None
+        orientations = ((width, height), (height, width)) if rot else \
+                ((width, height),)
+
+        for rotated, (w, h) in enumerate(orientations):
+            slots = numpy.flatnonzero(self._alive & (self._ws >= w) & (self._hs >= h))
+            if not len(slots):
+                continue
+
+            fit = fitness(self._xs[slots], self._ys[slots], self._ws[slots], 
+                    self._hs[slots], w, h)
+            value = fit.min()
+            if best is None or value < best[0]:
+                best = (value, slots[fit == value], bool(rotated))
+
+        if best is None:
+            return None, None
+
+        # Several rectangles with the same fitness, return the first
+        rid = min((self._slot_ids[s] for s in best[1]), key=self._order.__getitem__)
+        return self._rects[rid], best[2]
+
+
+
+class SectionIndex(object):
+    """Ordered collection of free sections used by the Guillotine algorithms.
+
+    Sections are kept in the order they were appended, and in lists sorted
+    by width, height, and area, so best fit queries only visit the sections
+    whose size is close to the requested one. Ties are broken by collection
+    order, the same way as evaluating all the sections in a list.
+
+    Sections are also indexed by their edges, so the sections sharing a 
+    full edge with another one can be found without checking all of them.
+
+    Sections are tracked by identity, they must not be modified while
+    stored in the index.
+    """
+
+    def __init__(self, sections=()):
+        """
+        Arguments:
+            sections (list): Initial sections in order
+        """
+        self._sections = {} # order key -> Rectangle
+        self._keys = {}     # id -> order key
+        self._widths = []   # Sorted (width, key) tuples
+        self._heights = []  # Sorted (height, key) tuples
+        self._areas = []    # Sorted (area, key) tuples
+        self._next_key = 0
+
+        # Edge -> set of order keys, horizontal edges are (x, width, y) and
+        # vertical edges (y, height, x)
+        self._bottoms = {}
+        self._tops = {}
+        self._lefts = {}
+        self._rights = {}
+
+        for s in sections:
+            self.append(s)
+
+    def __len__(self):
+        return len(self._sections)
+
+    def __bool__(self):
+        return bool(self._sections)
+
+    __nonzero__ = __bool__
+
+    def __iter__(self):
+        sections = self._sections
+        return iter([sections[k] for k in sorted(sections)])
+
+    def append(self, section):
+        """Add section at the end of the collection"""
+        key = self._next_key
+        self._next_key += 1
+        self._sections[key] = section
+        self._keys[id(section)] = key
+
+        bisect.insort(self._widths, (section.width, key))
+        bisect.insort(self._heights, (section.height, key))
+        bisect.insort(self._areas, (section.width*section.height, key))
+
+        for edges, edge in self._edges(section):
+            try:
+                edges[edge].add(key)
+            except KeyError:
+                edges[edge] = {key}
+
+    def remove(self, section):
+        """Remove section from the collection"""
+        key = self._keys.pop(id(section))
+        del self._sections[key]
+
+        for keys, value in ((self._widths, section.width),
+                (self._heights, section.height),
+                (self._areas, section.width*section.height)):
+            del keys[bisect.bisect_left(keys, (value, key))]
+
+        for edges, edge in self._edges(section):
+            keys = edges[edge]
+            keys.discard(key)
+            if not keys:
+                del edges[edge]
+
+    def _edges(self, section):
+        """Generate (edge dict, edge) tuples for the section edges"""
+        x, y, width, height = section.x, section.y, section.width, section.height
+        yield self._bottoms, (x, width, y)
+        yield self._tops, (x, width, y+height)
+        yield self._lefts, (y, height, x)
+        yield self._rights, (y, height, x+width)
+
+    def adjacent(self, section):
+        """Return the sections sharing a full edge with section, the ones
+        that can be joined with it into a single rectangle.
+
+        Returns:
+            list: (order key, section) tuples in collection order, the keys
+                increase with each appended section.
+        """
+        x, y, width, height = section.x, section.y, section.width, section.height
+        keys = set()
+        for edges, edge in ((self._bottoms, (x, width, y+height)),
+                (self._tops, (x, width, y)),
+                (self._lefts, (y, height, x+width)),
+                (self._rights, (y, height, x))):
+            keys.update(edges.get(edge, ()))
+
+        sections = self._sections
+        return [(k, sections[k]) for k in sorted(keys)]
+
+    def may_fit(self, width, height):
+        """Test in constant time if a rectangle of dimensions width x height
+        could fit in any section. When False it doesn't fit in any, when 
+        True the best fit queries must be used to find one.
+        """
+        return bool(self._widths) and width <= self._widths[-1][0] and \
+                height <= self._heights[-1][0] and \
+                width*height <= self._areas[-1][0]
+
+    def _result(self, best):
+        """Convert (fitness, key) into (fitness, section)"""
+        if best is None:
+            return None
+        return best[0], self._sections[best[1]]
+
+    def best_area_fit(self, width, height):
+        """Find the smallest section where a rectangle of dimensions
+        width x height fits.
+
+        Returns:
+            (fitness, section): Section with the lowest area-width*height,
+                the first one in collection order if there is a tie. 
+                None if the rectangle doesn't fit in any section.
+        """
+        if not self.may_fit(width, height):
+            return None
+
+        area = width*height
+        sections = self._sections
+        areas = self._areas
+
+        # Sections are visited by increasing area and order, so the first
+        # one the rectangle fits is the best.
+        for i in range(bisect.bisect_left(areas, (area,)), len(areas)):
+            section_area, key = areas[i]
+            s = sections[key]
+            if width <= s.width and height <= s.height:
+                return section_area-area, s
+        return None
+
+    def best_long_side_fit(self, width, height):
+        """Find the section with the lowest max(section.width-width,
+        section.height-height) where the rectangle fits.
+
+        Returns:
+            (fitness, section): Best section, the first one in collection
+                order if there is a tie. None if the rectangle doesn't fit
+                in any section.
+        """
+        if not self.may_fit(width, height):
+            return None
+
+        sections = self._sections
+        widths = self._widths
+        best = None
+
+        # The fitness is never lower than the width leftover, so sections
+        # wider than the best fitness found can be skipped.
+        for i in range(bisect.bisect_left(widths, (width,)), len(widths)):
+            section_width, key = widths[i]
+            if best is not None and section_width-width > best[0]:
+                break
+            s = sections[key]
+            if height <= s.height:
+                fit = (max(section_width-width, s.height-height), key)
+                if best is None or fit < best:
+                    best = fit
+
+        return self._result(best)
+
+    def best_short_side_fit(self, width, height):
+        """Find the section with the lowest min(section.width-width,
+        section.height-height) where the rectangle fits.
+
+        Returns:
+            (fitness, section): Best section, the first one in collection
+                order if there is a tie. None if the rectangle doesn't fit
+                in any section.
+        """
+        if not self.may_fit(width, height):
+            return None
+
+        sections = self._sections
+        widths, heights = self._widths, self._heights
+        nwidths, nheights = len(widths), len(heights)
+        i = bisect.bisect_left(widths, (width,))
+        j = bisect.bisect_left(heights, (height,))
+        best = None
+
+        # The fitness is equal to the width or the height leftover, visit
+        # the sections by increasing leftover in both lists until it is
+        # larger than the best fitness found.
+        while i < nwidths or j < nheights:
+            if j >= nheights or (i < nwidths and 
+                    widths[i][0]-width <= heights[j][0]-height):
+                leftover = widths[i][0]-width
+                key = widths[i][1]
+                i += 1
+            else:
+                leftover = heights[j][0]-height
+                key = heights[j][1]
+                j += 1
+
+            if best is not None and leftover > best[0]:
+                break
+            s = sections[key]
+            if width <= s.width and height <= s.height:
+                fit = (min(s.width-width, s.height-height), key)
+                if best is None or fit < best:
+                    best = fit
+
+        return self._result(best)
@@ -1,9 +1,13 @@
 from .pack_algo import PackingAlgorithm
 from .geometry import Rectangle
+from .index import RectIndex, ArrayRectIndex
 import itertools
-import collections
 import operator
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 first_item = operator.itemgetter(0)
 
@@ -12,7 +16,28 @@ first_item = operator.itemgetter(0)
 class MaxRects(PackingAlgorithm):
 
     def __init__(self, width, height, rot=True, *args, **kwargs):
+        """
+        Arguments:
+            width (int, float): Packing surface width
+            height (int, float): Packing surface height
+            rot (bool): Rectangle rotation enabled or disabled
+            vectorize (bool): Optional keyword argument, evaluate the fitness
+                of all max_rects at once with numpy. Ignored when numpy is 
+                not installed, and when the dimensions are not int or float.
+        """
+        self._vectorize = kwargs.pop('vectorize', False) and numpy is not None
         super(MaxRects, self).__init__(width, height, rot, *args, **kwargs)
+
+    @property
+    def _max_rects(self):
+        """List of maximal rectangles in the order they are evaluated"""
+        return list(self._free)
+
+    @_max_rects.setter
+    def _max_rects(self, rects):
+        index = ArrayRectIndex if self._vectorize else RectIndex
+        self._free = index(self.width, self.height, rects)
+        self._free_space_changed()
    
     def _rect_fitness(self, max_rect, width, height):
         """
@@ -30,6 +55,36 @@ class MaxRects(PackingAlgorithm):
         else:
             return None
 
+    def _rect_fitness_array(self, xs, ys, widths, heights, width, height):
+        """
+        Vectorized _rect_fitness, all rectangles in the arrays are big enough
+        to hold the placed rectangle.
+
+        Arguments:
+            xs, ys, widths, heights (numpy.ndarray): max_rects
+            width (int, float): Rectangle width
+            height (int, float): Rectangle height
+
+        Returns:
+            numpy.ndarray: fitness values
+        """
+        return numpy.zeros(len(widths))
+
+    def _select_position_array(self, w, h):
+        """
+        Vectorized version of _select_position, returns None when the 
+        rectangle can't be evaluated with numpy.
+        """
+        if not (self._vectorize and self._free.accepts(w, h)):
+            return None
+
+        m, rotated = self._free.best_fit(w, h, self.rot, self._rect_fitness_array)
+        if m is None:
+            return None, None
+        if rotated:
+            w, h = h, w
+        return Rectangle(m.x, m.y, w, h), m
+
     def _select_position(self, w, h): 
         """
         Find max_rect with best fitness for placing a rectangle
@@ -44,19 +99,20 @@ class MaxRects(PackingAlgorithm):
             rect (Rectangle): Placed rectangle or None if was unable.
             max_rect (Rectangle): Maximal rectangle were rect was placed
         """
-        if not self._max_rects:
+        if not self._free:
             return None, None
 
+        selected = self._select_position_array(w, h)
+        if selected is not None:
+            return selected
+
         # Normal rectangle
-        fitn = ((self._rect_fitness(m, w, h), w, h, m) for m in self._max_rects 
-                if self._rect_fitness(m, w, h) is not None)
+        fitn = ((self._rect_fitness(m, w, h), w, h, m) 
+                for m in self._free.fitting(w, h))
 
         # Rotated rectangle
-        fitr = ((self._rect_fitness(m, h, w), h, w, m) for m in self._max_rects 
-                if self._rect_fitness(m, h, w) is not None)
-
-        if not self.rot:
-            fitr = []
+        fitr = ((self._rect_fitness(m, h, w), h, w, m) 
+                for m in self._free.fitting(h, w)) if self.rot else []
 
         fit = itertools.chain(fitn, fitr)
         
@@ -104,30 +160,37 @@ class MaxRects(PackingAlgorithm):
         Returns:
             split (Rectangle list): List of rectangles resulting from the split
         """
-        max_rects = collections.deque()
-
-        for r in self._max_rects:
-            if r.intersects(rect):
-                max_rects.extend(self._generate_splits(r, rect))
-            else:
-                max_rects.append(r)
+        # Only the max_rects sharing a grid cell with rect are tested, each
+        # one is replaced by its splits at the same position.
+        new_rects = []
+        for r in self._free.intersecting(rect):
+            splits = self._generate_splits(r, rect)
+            self._free.replace(r, splits)
+            new_rects.extend(splits)
 
-        # Add newly generated max_rects
-        self._max_rects = list(max_rects)
+        self._free_space_changed()
+        return new_rects
 
-    def _remove_duplicates(self):
+    def _remove_duplicates(self, new_rects=None):
         """
         Remove every maximal rectangle contained by another one.
+
+        After a split the max_rects that weren't touched can't be contained
+        by any other, so when the list of new max_rects is provided only
+        those are checked.
+
+        Arguments:
+            new_rects (Rectangle list): max_rects created by the last split,
+                if None all max_rects are checked.
         """
-        contained = set()
-        for m1, m2 in itertools.combinations(self._max_rects, 2):
-            if m1.contains(m2):
-                contained.add(m2)
-            elif m2.contains(m1):
-                contained.add(m1)
-        
-        # Remove from max_rects
-        self._max_rects = [m for m in self._max_rects if m not in contained]
+        if new_rects is None:
+            new_rects = self._max_rects
+
+        # Find all contained before removing any, so rectangles with the 
+        # same dimensions are removed together.
+        contained = [m for m in new_rects if self._free.containing(m)]
+        for m in contained:
+            self._free.remove(m)
 
     def fitness(self, width, height): 
         """
@@ -145,7 +208,11 @@ class MaxRects(PackingAlgorithm):
         """
         assert(width > 0 and height > 0)
         
-        rect, max_rect = self._select_position(width, height)
+        try:
+            rect, max_rect = self._fitness_memo[(width, height)]
+        except KeyError:
+            rect, max_rect = self._memoize_selection(width, height,
+                self._select_position(width, height))
         if rect is None:
             return None
 
@@ -167,23 +234,30 @@ class MaxRects(PackingAlgorithm):
         """
         assert(width > 0 and height >0)
 
-        # Search best position and orientation
-        rect, _ = self._select_position(width, height)
+        # Search best position and orientation, unless it was already
+        # selected by fitness()
+        try:
+            rect, _ = self._fitness_memo.pop((width, height))
+        except KeyError:
+            rect, _ = self._select_position(width, height)
         if not rect:
             return None
         
         # Subdivide all the max rectangles intersecting with the selected 
         # rectangle.
-        self._split(rect)
+        new_rects = self._split(rect)
     
-        # Remove any max_rect contained by another 
-        self._remove_duplicates()
+        # Remove any new max_rect contained by another 
+        self._remove_duplicates(new_rects)
 
         # Store and return rectangle position.
         rect.rid = rid
-        self.rectangles.append(rect)
+        self._place(rect, rect.width != width)
         return rect
 
+    def free_regions(self):
+        return [(r.width, r.height) for r in self._free]
+
     def reset(self):
         super(MaxRects, self).reset()
         self._max_rects = [Rectangle(0, 0, self.width, self.height)]
@@ -192,6 +266,9 @@ class MaxRects(PackingAlgorithm):
 
 
 class MaxRectsBl(MaxRects):
+
+    # Fitness is 0 wherever the rectangle fits
+    monotone_fitness = True
     
     def _select_position(self, w, h): 
         """
@@ -199,13 +276,13 @@ class MaxRectsBl(MaxRects):
         is lower, if there are severtal pick the one with the smallest x 
         coordinate
         """
-        fitn = ((m.y+h, m.x, w, h, m) for m in self._max_rects 
-                if self._rect_fitness(m, w, h) is not None)
-        fitr = ((m.y+w, m.x, h, w, m) for m in self._max_rects 
-                if self._rect_fitness(m, h, w) is not None)
+        selected = self._select_position_array(w, h)
+        if selected is not None:
+            return selected
 
-        if not self.rot:
-            fitr = []
+        fitn = ((m.y+h, m.x, w, h, m) for m in self._free.fitting(w, h))
+        fitr = ((m.y+w, m.x, h, w, m) for m in self._free.fitting(h, w)) \
+                if self.rot else []
 
         fit = itertools.chain(fitn, fitr)
         
@@ -216,6 +293,9 @@ class MaxRectsBl(MaxRects):
 
         return Rectangle(m.x, m.y, w, h), m
 
+    def _rect_fitness_array(self, xs, ys, widths, heights, width, height):
+        return ys+height
+
 
 class MaxRectsBssf(MaxRects):
     """Best Sort Side Fit minimize short leftover side"""
@@ -224,6 +304,9 @@ class MaxRectsBssf(MaxRects):
             return None
 
         return min(max_rect.width-width, max_rect.height-height)
+
+    def _rect_fitness_array(self, xs, ys, widths, heights, width, height):
+        return numpy.minimum(widths-width, heights-height)
            
 class MaxRectsBaf(MaxRects):
     """Best Area Fit pick maximal rectangle with smallest area
@@ -234,6 +317,9 @@ class MaxRectsBaf(MaxRects):
         
         return (max_rect.width*max_rect.height)-(width*height)
 
+    def _rect_fitness_array(self, xs, ys, widths, heights, width, height):
+        return (widths*heights)-(width*height)
+
 
 class MaxRectsBlsf(MaxRects):
     """Best Long Side Fit minimize long leftover side"""
@@ -242,3 +328,6 @@ class MaxRectsBlsf(MaxRects):
             return None
 
         return max(max_rect.width-width, max_rect.height-height)
+
+    def _rect_fitness_array(self, xs, ys, widths, heights, width, height):
+        return numpy.maximum(widths-width, heights-height)
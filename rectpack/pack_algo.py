@@ -1,10 +1,21 @@
 from .geometry import Rectangle
+from .store import RectangleStore, typed_column
+
+import array
 
 
 class PackingAlgorithm(object):
     """PackingAlgorithm base class"""
 
-    def __init__(self, width, height, rot=True, bid=None, *args, **kwargs):
+    # Max number of placement selections remembered between placements
+    FITNESS_MEMO_SIZE = 1024
+
+    # The fitness of a rectangle never improves when other rectangles are
+    # added, so old fitness values are lower bounds of the current ones.
+    monotone_fitness = False
+
+    def __init__(self, width, height, rot=True, bid=None, compact=False, 
+            *args, **kwargs):
         """
         Initialize packing algorithm
 
@@ -13,12 +24,15 @@ class PackingAlgorithm(object):
             height (int, float): Packing surface height
             rot (bool): Rectangle rotation enabled or disabled
             bid (string|int|...): Packing surface identification
+            compact (bool): Store placed rectangles in a column based
+                RectangleStore instead of a list of Rectangles
         """
         self.width = width
         self.height = height
         self.rot = rot
         self.rectangles = []
         self.bid = bid
+        self.compact = compact
         self._surface = Rectangle(0, 0, width, height)
         self.reset()
 
@@ -63,6 +77,18 @@ class PackingAlgorithm(object):
         """
         return sum(r.area() for r in self)
 
+    def free_regions(self):
+        """
+        Dimensions of the free regions of the surface, a rectangle can only
+        be placed if it fits inside one of them (rotated if rotation is 
+        enabled). Regions may overlap and fitting inside one doesn't
+        guarantee the rectangle can be placed.
+
+        Returns:
+            List: Format [(width, height), ...]
+        """
+        return [(self.width, self.height)]
+
     def fitness(self, width, height, rot = False):
         """
         Metric used to rate how much space is wasted if a rectangle is placed.
@@ -80,6 +106,34 @@ class PackingAlgorithm(object):
         """
         raise NotImplementedError
         
+    def _memoize_selection(self, width, height, selection):
+        """
+        Remember the placement selected for a rectangle by fitness(), so
+        a later fitness() or add_rect() call with the same dimensions can 
+        reuse it. The memo must be cleared every time the free space 
+        changes.
+
+        Arguments:
+            width (int, float): Rectangle width
+            height (int, float): Rectangle height
+            selection: Algorithm specific placement selection
+
+        Returns:
+            selection
+        """
+        if len(self._fitness_memo) >= self.FITNESS_MEMO_SIZE:
+            self._fitness_memo.clear()
+        self._fitness_memo[(width, height)] = selection
+        return selection
+
+    def _free_space_changed(self):
+        """
+        Must be called every time the free space is split or merged, drops 
+        the memoized selections and bumps the free space version.
+        """
+        self._fitness_memo.clear()
+        self._version += 1
+
     def add_rect(self, width, height, rid=None):
         """
         Add rectangle of widthxheight dimensions.
@@ -102,12 +156,48 @@ class PackingAlgorithm(object):
         Returns:
             List: Format [(x, y, width, height, rid), ...]
         """
+        if self.compact:
+            return self.rectangles.rect_list()
+
         rectangle_list = []
         for r in self:
             rectangle_list.append((r.x, r.y, r.width, r.height, r.rid))
 
         return rectangle_list
 
+    def to_columns(self):
+        """
+        Returns the rectangles placed into the surface as columns, compact
+        bins return the RectangleStore columns without copying them.
+
+        Returns:
+            dict: 'x', 'y', 'width', 'height', 'rid', and 'rotated' columns,
+                typed arrays (array.array) or lists when values aren't int or
+                float. The columns must not be modified.
+        """
+        if self.compact:
+            x, y, width, height, rid = self.rectangles.columns()
+        else:
+            rects = self.rectangles
+            x = typed_column([r.x for r in rects])
+            y = typed_column([r.y for r in rects])
+            width = typed_column([r.width for r in rects])
+            height = typed_column([r.height for r in rects])
+            rid = [r.rid for r in rects]
+        return {'x': x, 'y': y, 'width': width, 'height': height, 'rid': rid,
+                'rotated': self._rotated}
+
+    def _place(self, rect, rotated):
+        """
+        Store placed rectangle
+
+        Arguments:
+            rect (Rectangle): Placed rectangle
+            rotated (bool): The rectangle was rotated before placing it
+        """
+        self.rectangles.append(rect)
+        self._rotated.append(rotated)
+
     def validate_packing(self):
         """
         Check for collisions between rectangles, also check all are placed
@@ -134,7 +224,18 @@ class PackingAlgorithm(object):
         return not bool(len(self))
 
     def reset(self):
-        self.rectangles = []    # List of placed Rectangles.
+        # List of placed Rectangles.
+        self.rectangles = RectangleStore() if self.compact else []
+
+        # Rotation flag for each placed rectangle
+        self._rotated = array.array('b')
+
+        # Placements selected by fitness() since the last change
+        self._fitness_memo = {}
+
+        # Free space version, fitness values computed for the same version
+        # are still valid.
+        self._version = 0
 
 
 
@@ -1,11 +1,22 @@
 from .maxrects import MaxRectsBssf
+from .geometry import Rectangle
+from .store import RectangleStore, concat_columns, typed_column
 
 import operator
 import itertools
 import collections
+import bisect
+import heapq
+import array
+from concurrent.futures import ProcessPoolExecutor
 
 import decimal
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # Float to Decimal helper
 def float2dec(ft, decimal_digits):
     """
@@ -25,26 +36,178 @@ def float2dec(ft, decimal_digits):
         return decimal.Decimal.from_float(float(ft)).quantize(places)
 
 
-# Sorting algos for rectangle lists
-SORT_AREA  = lambda rectlist: sorted(rectlist, reverse=True, 
-        key=lambda r: r[0]*r[1]) # Sort by area
+# Sorting algos for rectangle lists, defined as functions instead of lambdas
+# so they can be pickled and sent to other processes.
+def SORT_AREA(rectlist):
+    """Sort by area"""
+    return sorted(rectlist, reverse=True, key=lambda r: r[0]*r[1])
+
+def SORT_PERI(rectlist):
+    """Sort by perimeter"""
+    return sorted(rectlist, reverse=True, key=lambda r: r[0]+r[1])
+
+def SORT_DIFF(rectlist):
+    """Sort by Diff"""
+    return sorted(rectlist, reverse=True, key=lambda r: abs(r[0]-r[1]))
+
+# Tuple keys are slow to build and compare, large lists are sorted with
+# numpy when possible (see _ARGSORT_ALGOS).
+def SORT_SSIDE(rectlist):
+    """Sort by short side"""
+    return _sort_rects(rectlist, SORT_SSIDE,
+            lambda r: (min(r[0], r[1]), max(r[0], r[1])))
+
+def SORT_LSIDE(rectlist):
+    """Sort by long side"""
+    return _sort_rects(rectlist, SORT_LSIDE,
+            lambda r: (max(r[0], r[1]), min(r[0], r[1])))
+
+def SORT_RATIO(rectlist):
+    """Sort by side ratio"""
+    return sorted(rectlist, reverse=True, key=lambda r: r[0]/r[1])
+
+def SORT_NONE(rectlist):
+    """Unsorted"""
+    return list(rectlist)
+
+
+# Vectorized equivalents of the sorting algos, they return the indexes that
+# sort the width and height numpy arrays in the same (stable) order. Used
+# for rectangles added as columns, where they are always faster.
+_ARGSORT_ALGOS = {
+    SORT_AREA: lambda w, h: numpy.argsort(-(w*h), kind='stable'),
+    SORT_PERI: lambda w, h: numpy.argsort(-(w+h), kind='stable'),
+    SORT_DIFF: lambda w, h: numpy.argsort(-abs(w-h), kind='stable'),
+    SORT_SSIDE: lambda w, h: numpy.lexsort(
+        (-numpy.maximum(w, h), -numpy.minimum(w, h))),
+    SORT_LSIDE: lambda w, h: numpy.lexsort(
+        (-numpy.minimum(w, h), -numpy.maximum(w, h))),
+    SORT_RATIO: lambda w, h: numpy.argsort(-(w/h), kind='stable'),
+    SORT_NONE: lambda w, h: numpy.arange(len(w)),
+}
+
+# Larger int dimensions could overflow the int64 sort keys
+_ARGSORT_MAX_INT = 2**31
+
+# Smaller rectangle lists are sorted faster without numpy
+_ARGSORT_MIN_SIZE = 64
+
+
+def _as_list(values):
+    """Convert sequence or numpy array to a list of python numbers"""
+    return values.tolist() if hasattr(values, 'tolist') else list(values)
+
+
+def _take(values, order):
+    """Return list of the values in the positions listed in order"""
+    if values is None:
+        return [None]*len(order)
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        return values[order].tolist()
+    return [values[i] for i in order.tolist()]
+
+
+def _concat(columns):
+    """
+    Concatenate columns, numpy arrays with the same dtype are concatenated
+    into a new array otherwise they are converted to a list. Returns None
+    when all the columns are None.
+    """
+    if all(c is None for c in columns):
+        return None
+    if numpy is not None and \
+            all(isinstance(c, numpy.ndarray) for c in columns) and \
+            len(set(c.dtype for c in columns)) == 1:
+        return numpy.concatenate(columns)
+    result = []
+    for c in columns:
+        result.extend(_as_list(c))
+    return result
+
+
+def _column_list(column, size):
+    """Convert column returned by _concat to list"""
+    return [None]*size if column is None else _as_list(column)
 
-SORT_PERI  = lambda rectlist: sorted(rectlist, reverse=True, 
-        key=lambda r: r[0]+r[1]) # Sort by perimeter
 
-SORT_DIFF  = lambda rectlist: sorted(rectlist, reverse=True, 
-        key=lambda r: abs(r[0]-r[1])) # Sort by Diff
+def _argsort_columns(sort_algo, widths, heights):
+    """
+    Return the indexes sorting the rectangles with sort_algo computed with
+    numpy, or None when sort_algo has no vectorized equivalent, numpy isn't
+    installed, or the dimensions aren't int or float (i.e. Decimal).
+    """
+    argsort = _ARGSORT_ALGOS.get(sort_algo) if numpy is not None else None
+    if argsort is None or not len(widths):
+        return None
+
+    columns = []
+    for values in (widths, heights):
+        column = numpy.asarray(values)
+        kind = column.dtype.kind
+        if kind not in 'iuf':
+            return None
+        if kind != 'f' and numpy.abs(column).max() >= _ARGSORT_MAX_INT:
+            return None
+        # Compute the keys with 64 bits so narrow or unsigned dtypes
+        # don't overflow or round differently than python numbers.
+        columns.append(column.astype(numpy.int64 if kind in 'iu' 
+            else numpy.float64, copy=False))
+    return argsort(*columns)
 
-SORT_SSIDE = lambda rectlist: sorted(rectlist, reverse=True, 
-        key=lambda r: (min(r[0], r[1]), max(r[0], r[1]))) # Sort by short side
 
-SORT_LSIDE = lambda rectlist: sorted(rectlist, reverse=True, 
-        key=lambda r: (max(r[0], r[1]), min(r[0], r[1]))) # Sort by long side
+def _sort_rects(rectlist, sort_algo, key):
+    """
+    Sort rectangles in descending key order, large lists are sorted with
+    the vectorized equivalent of sort_algo when possible.
 
-SORT_RATIO = lambda rectlist: sorted(rectlist, reverse=True,
-        key=lambda r: r[0]/r[1]) # Sort by side ratio
+    Arguments:
+        rectlist (list): Rectangles (width, height, rid)
+        sort_algo (function): SORT_* function calling this
+        key (function): Sort key
 
-SORT_NONE = lambda rectlist: list(rectlist) # Unsorted
+    Returns:
+        list: Sorted rectangles
+    """
+    rects = list(rectlist)
+    if len(rects) >= _ARGSORT_MIN_SIZE and numpy is not None:
+        order = _argsort_columns(sort_algo, 
+                [r[0] for r in rects], [r[1] for r in rects])
+        if order is not None:
+            return [rects[i] for i in order.tolist()]
+    return sorted(rects, reverse=True, key=key)
+
+
+def _sort_columns(sort_algo, widths, heights, rids):
+    """
+    Sort rectangles stored as columns with sort_algo.
+
+    Arguments:
+        sort_algo (function): One of the SORT_* functions or custom one
+        widths, heights, rids (list, numpy.ndarray): Rectangle columns
+
+    Returns:
+        list: Sorted list of (width, height, rid) tuples
+    """
+    order = _argsort_columns(sort_algo, widths, heights)
+    if order is None:
+        return sort_algo(list(zip(_as_list(widths), _as_list(heights), 
+            _column_list(rids, len(widths)))))
+    return list(zip(_take(widths, order), _take(heights, order), 
+        _take(rids, order)))
+
+
+# Partition algos for sharded packing, they split the rectangle list into
+# the requested number of shards.
+def PARTITION_ROUND_ROBIN(rectlist, shards):
+    """Deal rectangles by descending area, shards get similar size mixes"""
+    rects = SORT_AREA(rectlist)
+    return [rects[i::shards] for i in range(shards)]
+
+def PARTITION_SIZE_CLASS(rectlist, shards):
+    """Split rectangles by descending area, each shard one size class"""
+    rects = SORT_AREA(rectlist)
+    size = -(-len(rects)//shards)
+    return [rects[i*size:(i+1)*size] for i in range(shards)]
 
 
 
@@ -99,6 +262,128 @@ class BinFactory(object):
 
 
 
+class BinBoundIndex(object):
+    """
+    Open bins sorted by the longest short side of their free regions, so
+    the bins where a rectangle can't fit are skipped without calling their
+    fitness. Bins must be updated every time a rectangle is added.
+    """
+
+    def __init__(self):
+        self._keys = []     # Sorted max short side of the free regions
+        self._bins = []     # (serial, bin, max long side, regions) same order as _keys
+        self._entries = {}  # id(bin) -> (key, serial)
+        self._serial = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, pbin):
+        return id(pbin) in self._entries
+
+    def _insert(self, pbin, serial):
+        regions = pbin.free_regions()
+        key = max([min(r) for r in regions] or [0])
+        long_side = max([max(r) for r in regions] or [0])
+        i = bisect.bisect_right(self._keys, key)
+        self._keys.insert(i, key)
+        self._bins.insert(i, (serial, pbin, long_side, regions))
+        self._entries[id(pbin)] = (key, serial)
+
+    def add(self, pbin):
+        """Add new open bin, bins are numbered in the order they are added"""
+        self._insert(pbin, next(self._serial))
+
+    def remove(self, pbin):
+        """Remove bin from the index and return its number"""
+        key, serial = self._entries.pop(id(pbin))
+        i = bisect.bisect_left(self._keys, key)
+        while self._bins[i][1] is not pbin:
+            i += 1
+        del self._keys[i]
+        del self._bins[i]
+        return serial
+
+    def update(self, pbin):
+        """Update bin free regions after a rectangle was added"""
+        self._insert(pbin, self.remove(pbin))
+
+    def candidates(self, width, height):
+        """
+        Generate the bins where a rectangle of widthxheight dimensions 
+        could fit, the fitness of the rest is guaranteed to be None.
+
+        Returns:
+            generator: (bin number, bin) tuples in arbitrary order
+        """
+        short_side, long_side = min(width, height), max(width, height)
+        i = bisect.bisect_left(self._keys, short_side)
+        for serial, pbin, max_long, regions in self._bins[i:]:
+            if long_side > max_long:
+                continue
+            if pbin.rot:
+                fits = any(short_side <= min(w, h) and long_side <= max(w, h)
+                        for w, h in regions)
+            else:
+                fits = any(width <= w and height <= h for w, h in regions)
+            if fits:
+                yield serial, pbin
+
+
+
+class RectSizeIndex(object):
+    """
+    Rectangles sorted by short side and then long side, so those that can't
+    fit inside any of a bin's free regions are skipped at once.
+    """
+
+    def __init__(self, rects=()):
+        """
+        Arguments:
+            rects (list): Rectangles in the format [(key, width, height), ...]
+                keys must be unique and comparable.
+        """
+        self._sizes = sorted((min(w, h), max(w, h), k) for k, w, h in rects)
+        self._shorts = [s[0] for s in self._sizes]
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def remove(self, key, width, height):
+        i = bisect.bisect_left(self._sizes, (min(width, height), 
+            max(width, height), key))
+        del self._sizes[i]
+        del self._shorts[i]
+
+    def fitting(self, regions):
+        """
+        Return the keys of the rectangles that fit inside one of the regions
+        either rotated or not, in arbitrary order.
+
+        Arguments:
+            regions (list): Free regions [(width, height), ...]
+        """
+        if not regions:
+            return []
+
+        # Sorted region short sides, and the max long side of the regions
+        # with a short side greater or equal to each of them.
+        regions = sorted((min(r), max(r)) for r in regions)
+        shorts = [r[0] for r in regions]
+        longs = [r[1] for r in regions]
+        for i in range(len(longs)-2, -1, -1):
+            longs[i] = max(longs[i], longs[i+1])
+
+        keys = []
+        sizes = self._sizes
+        for n in range(bisect.bisect_right(self._shorts, shorts[-1])):
+            short_side, long_side, key = sizes[n]
+            if long_side <= longs[bisect.bisect_left(shorts, short_side)]:
+                keys.append(key)
+        return keys
+
+
+
 class PackerBNFMixin(object):
     """
     BNF (Bin Next Fit): Only one open bin at a time.  If the rectangle
@@ -106,6 +391,11 @@ class PackerBNFMixin(object):
     """
 
     def add_rect(self, width, height, rid=None):
+        placement = self._add_rect(width, height, rid)
+        return placement[1] if placement else None
+
+    def _add_rect(self, width, height, rid=None):
+        """Returns (bin, rectangle) placement or None"""
         while True:
             # if there are no open bins, try to open a new one
             if len(self._open_bins)==0:
@@ -115,13 +405,13 @@ class PackerBNFMixin(object):
                     return None
 
             # we have at least one open bin, so check if it can hold this rect
-            rect = self._open_bins[0].add_rect(width, height, rid=rid)
+            pbin = self._open_bins[0]
+            rect = pbin.add_rect(width, height, rid=rid)
             if rect is not None:
-                return rect
+                return pbin, rect
 
             # since the rect doesn't fit, close this bin and try again
-            closed_bin = self._open_bins.popleft()
-            self._closed_bins.append(closed_bin)
+            self._close_bin(self._open_bins[0])
 
 
 class PackerBFFMixin(object):
@@ -130,11 +420,17 @@ class PackerBFFMixin(object):
     """
  
     def add_rect(self, width, height, rid=None):
+        placement = self._add_rect(width, height, rid)
+        return placement[1] if placement else None
+
+    def _add_rect(self, width, height, rid=None):
+        """Returns (bin, rectangle) placement or None"""
         # see if this rect will fit in any of the open bins
         for b in self._open_bins:
             rect = b.add_rect(width, height, rid=rid)
             if rect is not None:
-                return rect
+                self._close_saturated(b)
+                return b, rect
 
         while True:
             # can we find an unopened bin that will hold this rect?
@@ -146,7 +442,8 @@ class PackerBFFMixin(object):
             # so we have to double-check
             rect = new_bin.add_rect(width, height, rid=rid)
             if rect is not None:
-                return rect
+                self._close_saturated(new_bin)
+                return new_bin, rect
 
 
 class PackerBBFMixin(object):
@@ -157,29 +454,44 @@ class PackerBBFMixin(object):
     # only create this getter once
     first_item = operator.itemgetter(0)
 
+    # (fitness, bin number) key, ties go to the first opened bin
+    fitness_key = operator.itemgetter(0, 1)
+
     def add_rect(self, width, height, rid=None):
- 
-        # Try packing into open bins
-        fit = ((b.fitness(width, height),  b) for b in self._open_bins)
+        return self._add_rect(width, height, rid) is not None
+
+    def _add_rect(self, width, height, rid=None):
+        """Returns (bin, rectangle) placement or None"""
+        # Try packing into open bins, skipping those where it can't fit
+        bounds = self._open_bounds
+        fit = ((b.fitness(width, height), serial, b) 
+                for serial, b in bounds.candidates(width, height))
         fit = (b for b in fit if b[0] is not None)
         try:
-            _, best_bin = min(fit, key=self.first_item)
-            best_bin.add_rect(width, height, rid)
-            return True
+            _, _, best_bin = min(fit, key=self.fitness_key)
         except ValueError:
             pass    
+        else:
+            rect = best_bin.add_rect(width, height, rid)
+            bounds.update(best_bin)
+            self._close_saturated(best_bin)
+            return best_bin, rect
 
         # Try packing into one of the empty bins
         while True:
             # can we find an unopened bin that will hold this rect?
             new_bin = self._new_open_bin(width, height, rid=rid)
             if new_bin is None:
-                return False
+                return None
 
             # _new_open_bin may return a bin that's too small,
             # so we have to double-check
-            if new_bin.add_rect(width, height, rid):
-                return True
+            bounds.add(new_bin)
+            rect = new_bin.add_rect(width, height, rid)
+            if rect:
+                bounds.update(new_bin)
+                self._close_saturated(new_bin)
+                return new_bin, rect
 
 
 
@@ -188,14 +500,23 @@ class PackerOnline(object):
     Rectangles are packed as soon are they are added
     """
 
-    def __init__(self, pack_algo=MaxRectsBssf, rotation=True):
+    def __init__(self, pack_algo=MaxRectsBssf, rotation=True, saturation=None,
+            sink=None):
         """
         Arguments:
             pack_algo (PackingAlgorithm): What packing algo to use
             rotation (bool): Enable/Disable rectangle rotation
+            saturation (tuple): (width, height) of the smallest rectangle 
+                expected, BFF and BBF packers close the open bins where it 
+                can no longer be placed.
+            sink (callable): Streaming mode, closed bins are passed to sink
+                and released instead of kept by the packer, so only open
+                bins are iterated, indexed, and listed by rect_list().
         """
         self._rotation = rotation
         self._pack_algo = pack_algo
+        self._saturation = saturation
+        self._sink = sink
         self.reset()
 
     def __iter__(self):
@@ -247,6 +568,9 @@ class PackerOnline(object):
             if new_bin is None:
                 continue
             self._open_bins.append(new_bin)
+            if self._sink is not None:
+                self._bin_index[id(new_bin)] = self._opened_count
+                self._opened_count += 1
 
             # If the factory was depleted mark for deletion
             if binfac.is_empty():
@@ -260,23 +584,212 @@ class PackerOnline(object):
 
         return new_bin 
 
+    @staticmethod
+    def _min_size(width, height):
+        return (width, height, min(width, height), max(width, height))
+
+    def _is_saturated(self, pbin):
+        """
+        Test none of the free regions of the bin can hold a rectangle of the
+        current saturation size.
+        """
+        min_width, min_height, min_short, min_long = self._saturation_size
+        for width, height in pbin.free_regions():
+            if pbin.rot:
+                if min(width, height) >= min_short and \
+                        max(width, height) >= min_long:
+                    return False
+            elif width >= min_width and height >= min_height:
+                return False
+        return True
+
+    def _close_bin(self, pbin):
+        self._open_bins.remove(pbin)
+        if pbin in self._open_bounds:
+            self._open_bounds.remove(pbin)
+        if self._sink is None:
+            self._closed_bins.append(pbin)
+        else:
+            self._released_count += 1
+            try:
+                self._sink(pbin)
+            finally:
+                del self._bin_index[id(pbin)]
+
+    def _close_saturated(self, pbin):
+        """Close open bin if the saturation policy is enabled and it's full"""
+        if self._saturation_size is not None and self._is_saturated(pbin):
+            self._close_bin(pbin)
+
+    def _close_saturated_bins(self):
+        """Close all saturated open bins"""
+        if self._saturation_size is None:
+            return
+        for pbin in [b for b in self._open_bins if self._is_saturated(b)]:
+            self._close_bin(pbin)
+
+    @property
+    def closed_count(self):
+        """Number of bins closed, including those passed to the sink"""
+        return len(self._closed_bins)+self._released_count
+
+    def flush(self):
+        """
+        Close all the open bins, in streaming mode they are passed to the
+        sink and released.
+        """
+        while self._open_bins:
+            self._close_bin(self._open_bins[0])
+
     def add_bin(self, width, height, count=1, **kwargs):
         # accept the same parameters as PackingAlgorithm objects
         kwargs['rot'] = self._rotation
         bin_factory = BinFactory(width, height, count, self._pack_algo, **kwargs)
         self._empty_bins[next(self._bin_count)] = bin_factory
 
+    def add_bins(self, widths, heights, counts=None, bids=None, **kwargs):
+        """
+        Add several bins at once.
+
+        Arguments:
+            widths, heights (list, numpy.ndarray): Bin sizes
+            counts (list, numpy.ndarray): Number of bins of each size, 
+                1 if None
+            bids (list): Bin ids, None if not provided
+            kwargs: Extra arguments shared by all the bins
+        """
+        widths, heights = _as_list(widths), _as_list(heights)
+        counts = [1]*len(widths) if counts is None else _as_list(counts)
+        bids = [None]*len(widths) if bids is None else _as_list(bids)
+        if not len(widths) == len(heights) == len(counts) == len(bids):
+            raise AttributeError("Bin columns must have the same length")
+        for width, height, count, bid in zip(widths, heights, counts, bids):
+            if bid is not None:
+                self.add_bin(width, height, count, bid=bid, **kwargs)
+            else:
+                self.add_bin(width, height, count, **kwargs)
+
+    def add_rects(self, widths, heights, rids=None):
+        """
+        Add several rectangles at once.
+
+        Arguments:
+            widths, heights (list, numpy.ndarray): Rectangle sizes
+            rids (list, numpy.ndarray): Rectangle ids, None if not provided
+        """
+        widths, heights = _as_list(widths), _as_list(heights)
+        rids = [None]*len(widths) if rids is None else _as_list(rids)
+        if not len(widths) == len(heights) == len(rids):
+            raise AttributeError("Rectangle columns must have the same length")
+        for width, height, rid in zip(widths, heights, rids):
+            self.add_rect(width, height, rid)
+
+    def _indexed_bins(self):
+        """Return the list of (bin index, bin) tuples"""
+        if self._sink is None:
+            return list(enumerate(self))
+        return [(self._bin_index[id(b)], b) for b in self._open_bins]
+
+    def bin_index(self, pbin):
+        """
+        Return the index of a bin in rect_list(), to_columns(), and 
+        rect_array(). In streaming mode it is the number of bins opened 
+        before it, so it doesn't change when other bins are released, and 
+        it is also available while the bin is passed to the sink.
+        """
+        if self._sink is not None:
+            return self._bin_index[id(pbin)]
+        for i, b in enumerate(self):
+            if b is pbin:
+                return i
+        raise ValueError("Bin not in packer")
+
     def rect_list(self):
         rectangles = []
-        bin_count = 0
 
-        for abin in self:
+        for bin_count, abin in self._indexed_bins():
             for rect in abin:
                 rectangles.append((bin_count, rect.x, rect.y, rect.width, rect.height, rect.rid))
-            bin_count += 1
 
         return rectangles
 
+    def to_columns(self):
+        """
+        Return the packed rectangles as columns instead of the tuples
+        returned by rect_list(), plus the rotation flag of each one.
+
+        Returns:
+            dict: 'bin', 'x', 'y', 'width', 'height', 'rid', and 'rotated'
+                columns. Typed arrays (array.array) when all the values are
+                int or float, otherwise lists.
+        """
+        indexed = self._indexed_bins()
+        bins = [b.to_columns() for _, b in indexed]
+        columns = {'bin': array.array('q')}
+        for (i, _), b in zip(indexed, bins):
+            columns['bin'].extend(array.array('q', [i])*len(b['rotated']))
+        for name in ('x', 'y', 'width', 'height', 'rid', 'rotated'):
+            columns[name] = concat_columns([b[name] for b in bins])
+        if isinstance(columns['rid'], list):
+            columns['rid'] = typed_column(columns['rid'])
+        if not columns['rotated']:
+            columns['rotated'] = array.array('b')
+        return columns
+
+    def rect_array(self):
+        """
+        Return the packed rectangles as a numpy structured array with the
+        fields 'bin', 'x', 'y', 'width', 'height', 'rid', and 'rotated'.
+        Coordinates are int64 or float64 when possible, otherwise objects,
+        and rid is int64 when all the ids are int.
+
+        Returns:
+            numpy.ndarray: Packed rectangles
+        """
+        if numpy is None:
+            raise ImportError("rect_array() requires numpy")
+
+        indexed = self._indexed_bins()
+        bins = [b.to_columns() for _, b in indexed]
+        size = sum(len(b['rotated']) for b in bins)
+
+        def column_dtype(name, kinds):
+            # Smallest dtype from kinds able to hold all the column values
+            found = set()
+            for b in bins:
+                column = b[name]
+                if isinstance(column, array.array):
+                    found.add(column.typecode)
+                else:
+                    found.update(RectangleStore._typecodes.get(type(v)) 
+                            for v in column)
+            for typecodes, dtype in kinds:
+                if found <= typecodes:
+                    return dtype
+            return object
+
+        numbers = [(set(['q']), numpy.int64), (set(['q', 'd']), numpy.float64)]
+        dtype = [('bin', numpy.int64)]
+        dtype += [(name, column_dtype(name, numbers))
+                for name in ('x', 'y', 'width', 'height')]
+        dtype += [('rid', column_dtype('rid', numbers[:1])), 
+                ('rotated', numpy.bool_)]
+
+        # Fill preallocated array bin by bin
+        result = numpy.empty(size, dtype=dtype)
+        start = 0
+        for (i, _), b in zip(indexed, bins):
+            end = start+len(b['rotated'])
+            result['bin'][start:end] = i
+            for name in ('x', 'y', 'width', 'height', 'rid', 'rotated'):
+                column = b[name]
+                if isinstance(column, array.array) and len(column):
+                    # Read typed arrays without copying
+                    column = numpy.frombuffer(column, dtype=column.typecode)
+                result[name][start:end] = column
+            start = end
+        return result
+
     def bin_list(self):
         """
         Return a list of the dimmensions of the bins in use, that is closed
@@ -292,9 +805,26 @@ class PackerOnline(object):
         # Bins fully packed and closed.
         self._closed_bins = collections.deque()
 
+        # Number of closed bins passed to the sink
+        self._released_count = 0
+
+        # Streaming mode bin indexes by bin id, and number of bins opened,
+        # so the index of a bin doesn't change when others are released.
+        self._bin_index = {}
+        self._opened_count = 0
+
         # Bins ready to pack rectangles
         self._open_bins = collections.deque()
 
+        # Open bins indexed by their free space bounds (BBF)
+        self._open_bounds = BinBoundIndex()
+
+        # Smallest rectangle size used to detect saturated bins, in the
+        # format (width, height, short side, long side)
+        self._saturation_size = None
+        if self._saturation and self._saturation is not True:
+            self._saturation_size = self._min_size(*self._saturation)
+
         # User provided bins not in current use
         self._empty_bins = collections.OrderedDict() # O(1) deletion of arbitrary elem
         self._bin_count = itertools.count()
@@ -306,10 +836,15 @@ class Packer(PackerOnline):
     """
 
     def __init__(self, pack_algo=MaxRectsBssf, sort_algo=SORT_NONE, 
-            rotation=True):
+            rotation=True, saturation=None):
         """
+        Arguments:
+            saturation (bool, tuple): When True BFF and BBF packers close 
+                the open bins where none of the remaining rectangles can be 
+                placed, a (width, height) tuple works as in online mode.
         """
-        super(Packer, self).__init__(pack_algo=pack_algo, rotation=rotation)
+        super(Packer, self).__init__(pack_algo=pack_algo, rotation=rotation,
+                saturation=saturation)
         
         self._sort_algo = sort_algo
 
@@ -317,6 +852,11 @@ class Packer(PackerOnline):
         self._avail_bins = collections.deque()
         self._avail_rect = collections.deque()
 
+        # Rectangles added with add_rects stored as columns, in the format
+        # (position, widths, heights, rids) where position is the number of
+        # _avail_rect rectangles added before them.
+        self._rect_batches = []
+
         # Aux vars used during packing
         self._sorted_rect = []
 
@@ -326,27 +866,200 @@ class Packer(PackerOnline):
     def add_rect(self, width, height, rid=None):
         self._avail_rect.append((width, height, rid))
 
+    def add_rects(self, widths, heights, rids=None):
+        # Store columns as they are, tuples are only created while packing
+        if numpy is None or not isinstance(widths, numpy.ndarray):
+            widths = list(widths)
+        if numpy is None or not isinstance(heights, numpy.ndarray):
+            heights = list(heights)
+        if rids is not None and \
+                (numpy is None or not isinstance(rids, numpy.ndarray)):
+            rids = list(rids)
+        if len(widths) != len(heights) or \
+                (rids is not None and len(rids) != len(widths)):
+            raise AttributeError("Rectangle columns must have the same length")
+        if len(widths):
+            self._rect_batches.append((len(self._avail_rect), 
+                widths, heights, rids))
+
+    def _rect_columns(self):
+        """
+        Return the widths, heights, and rids columns of all the rectangles
+        in the same order they were added.
+        """
+        columns = ([], [], [])
+        avail = list(self._avail_rect)
+        start = 0
+        for position, widths, heights, rids in self._rect_batches:
+            if position > start:
+                for column, values in zip(columns, 
+                        zip(*avail[start:position])):
+                    column.append(list(values))
+            for column, values in zip(columns, (widths, heights, rids)):
+                column.append(values)
+            start = position
+        if len(avail) > start:
+            for column, values in zip(columns, zip(*avail[start:])):
+                column.append(list(values))
+        widths, heights, rids = columns
+        if any(r is None for r in rids) and not all(r is None for r in rids):
+            rids = [[None]*len(w) if r is None else r 
+                    for w, r in zip(widths, rids)]
+        return _concat(widths), _concat(heights), _concat(rids)
+
+    def _avail_rects(self):
+        """Return list of all the rectangles added (width, height, rid)"""
+        if not self._rect_batches:
+            return list(self._avail_rect)
+        widths, heights, rids = self._rect_columns()
+        return list(zip(_as_list(widths), _as_list(heights), 
+            _column_list(rids, len(widths))))
+
     def _is_everything_ready(self):
-        return self._avail_rect and self._avail_bins
+        return (self._avail_rect or self._rect_batches) and self._avail_bins
+
+    def _remaining_min_sizes(self, rects):
+        """
+        Return the list of the smallest sizes of the rectangles remaining
+        before each one is packed, the last element is None.
+        """
+        sizes = [None]*(len(rects)+1)
+        current = None
+        for i in range(len(rects)-1, -1, -1):
+            size = self._min_size(rects[i][0], rects[i][1])
+            if current is not None:
+                size = tuple(map(min, current, size))
+            sizes[i] = current = size
+        return sizes
+
+    def _shard_options(self):
+        """Constructor arguments for the packers used to pack each shard"""
+        return {'pack_algo': self._pack_algo, 'sort_algo': self._sort_algo,
+                'rotation': self._rotation, 'saturation': self._saturation}
+
+    def _pack_shards(self, shards, partitioner, max_workers, executor):
+        """
+        Pack each shard of rectangles in a separate process with its share
+        of the bins, and store the bins used as closed bins.
+
+        Returns:
+            tuple: (bins, rects) Bins left unused and rectangles that
+                couldn't be packed in any of the shards.
+        """
+        rects = self._avail_rects()
+        parts = [p for p in partitioner(rects, shards) if p]
+
+        # Divide bins between shards, infinite bins are shared. The bin 
+        # options are passed too so shards pack with the same algorithm
+        # settings, but bid is replaced by the bin index.
+        remaining = [b[2] for b in self._avail_bins]
+        shard_bins = []
+        for i in range(len(parts)):
+            bins = []
+            for (width, height, count, kwargs) in self._avail_bins:
+                if count != float("inf"):
+                    count = count//len(parts) + (i < count%len(parts))
+                options = {k: v for k, v in kwargs.items() if k != 'bid'}
+                bins.append((width, height, count, options))
+            shard_bins.append(bins)
+
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
 
-    def pack(self):
+        try:
+            futures = [executor.submit(_pack_shard, type(self), 
+                self._shard_options(), bins, [r[0] for r in part], 
+                [r[1] for r in part])
+                for bins, part in zip(shard_bins, parts)]
+            results = [f.result() for f in futures]
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+        # Rebuild packed bins in this process
+        unpacked = []
+        for part, (packed_bins, packed_rects) in zip(parts, results):
+            for bin_index, rects_list in packed_bins:
+                width, height, _, kwargs = self._avail_bins[bin_index]
+                remaining[bin_index] -= 1
+                new_bin = self._pack_algo(width, height, 
+                        rot=self._rotation, **kwargs)
+                for x, y, w, h, rect_index in rects_list:
+                    rect = part[rect_index]
+                    new_bin._place(Rectangle(x, y, w, h, rect[2]), 
+                            w != rect[0])
+                self._closed_bins.append(new_bin)
+
+            unpacked.extend(r for i, r in enumerate(part) 
+                    if i not in packed_rects)
+
+        bins = [(b[0], b[1], count, b[3]) 
+                for b, count in zip(self._avail_bins, remaining) if count > 0]
+        return bins, unpacked
+
+    def pack(self, shards=1, partitioner=PARTITION_ROUND_ROBIN, 
+            max_workers=None, executor=None):
+        """
+        Pack the rectangles added so far.
 
+        Arguments:
+            shards (int): When greater than one the rectangles are split into 
+                this many shards with partitioner, and each one is packed 
+                in parallel with its share of the bins. The rectangles that 
+                don't fit in their shard are packed afterwards into the 
+                remaining bins. Faster for very large jobs, but the packing 
+                quality is usually lower.
+            partitioner (function): Splits the rectangles into shards 
+                (PARTITION_ROUND_ROBIN, PARTITION_SIZE_CLASS).
+            max_workers (int): Max number of processes for sharded packing,
+                by default the number of processors.
+            executor (concurrent.futures.Executor): Use this executor for 
+                sharded packing instead of creating a process pool.
+        """
         self.reset()
 
         if not self._is_everything_ready():
             # maybe we should throw an error here?
             return
 
+        if shards > 1:
+            bins, rects = self._pack_shards(shards, partitioner, 
+                    max_workers, executor)
+            rects = self._sort_algo(rects)
+        elif self._rect_batches:
+            bins = self._avail_bins
+            rects = _sort_columns(self._sort_algo, *self._rect_columns())
+        else:
+            bins = self._avail_bins
+            rects = self._sort_algo(self._avail_rect)
+
+        self._pack(bins, rects)
+
+    def _pack(self, bins, rects):
+        """Pack sorted rectangles rects into bins"""
         # Add available bins to packer
-        for b in self._avail_bins:
+        for b in bins:
             width, height, count, extra_kwargs = b
             super(Packer, self).add_bin(width, height, count, **extra_kwargs)
 
-        # If enabled sort rectangles
-        self._sorted_rect = self._sort_algo(self._avail_rect)
+        self._sorted_rect = rects
+
+        # Track the smallest remaining rectangle for the saturation policy
+        sizes = None
+        if self._saturation is True:
+            sizes = self._remaining_min_sizes(self._sorted_rect)
 
         # Start packing
-        for r in self._sorted_rect:
+        for i, r in enumerate(self._sorted_rect):
+            if sizes is not None:
+                # Some of the smallest rectangles were packed, check which
+                # open bins can't hold the remaining ones
+                if i > 0 and sizes[i] != sizes[i-1]:
+                    self._saturation_size = sizes[i]
+                    self._close_saturated_bins()
+                self._saturation_size = sizes[i+1]
+
             super(Packer, self).add_rect(*r)
 
 
@@ -394,12 +1107,24 @@ class PackerGlobal(Packer, PackerBNFMixin):
     GLOBAL: For each bin pack the rectangle with the best fitness.
     """
     first_item = operator.itemgetter(0)
+
+    # (fitness, rectangle key) ties go to the first rectangle
+    fitness_key = operator.itemgetter(0, 1)
     
-    def __init__(self, pack_algo=MaxRectsBssf, rotation=True):
+    def __init__(self, pack_algo=MaxRectsBssf, rotation=True, lazy=True):
         """
+        Arguments:
+            lazy (bool): Keep the rectangles in a fitness heap and only 
+                evaluate again those at the top, for packing algorithms 
+                with monotone_fitness. Otherwise the fitness of all the 
+                remaining rectangles is evaluated after each placement.
         """
         super(PackerGlobal, self).__init__(pack_algo=pack_algo,
             sort_algo=SORT_NONE, rotation=rotation)
+        self._lazy = lazy
+
+        # Remaining rectangles sorted by size
+        self._rect_index = RectSizeIndex()
 
     def _find_best_fit(self, pbin):
         """
@@ -411,14 +1136,60 @@ class PackerGlobal(Packer, PackerBNFMixin):
         Returns:
             key of the rectangle with best fitness
         """
-        fit = ((pbin.fitness(r[0], r[1]), k) for k, r in self._sorted_rect.items())
+        # Only rectangles fitting in one of the free regions are evaluated
+        keys = self._rect_index.fitting(pbin.free_regions())
+        rects = self._sorted_rect
+        fit = ((pbin.fitness(rects[k][0], rects[k][1]), k) for k in keys)
         fit = (f for f in fit if f[0] is not None)
         try:
-            _, rect = min(fit, key=self.first_item)
+            _, rect = min(fit, key=self.fitness_key)
             return rect
         except ValueError:
             return None
 
+    def _fitness_heap(self, pbin):
+        """
+        Return heap with the fitness of all the remaining rectangles 
+        that fit into the bin.
+
+        Returns:
+            list: Heap of (fitness, rectangle key, bin version) tuples
+        """
+        keys = self._rect_index.fitting(pbin.free_regions())
+        rects = self._sorted_rect
+        fit = ((pbin.fitness(rects[k][0], rects[k][1]), k) for k in keys)
+        heap = [(f, k, pbin._version) for f, k in fit if f is not None]
+        heapq.heapify(heap)
+        return heap
+
+    def _find_best_fit_lazy(self, pbin, heap):
+        """
+        Same as _find_best_fit but only evaluating again the rectangles at 
+        the top of the heap, until one with a fitness value computed for 
+        the current bin version is found. Only valid when the bin fitness
+        is monotone, so stale values are lower bounds of the current ones.
+
+        Arguments:
+            pbin (PackingAlgorithm): Packing bin
+            heap (list): Heap returned by _fitness_heap
+
+        Returns:
+            key of the rectangle with best fitness
+        """
+        rects = self._sorted_rect
+        while heap:
+            _, key, version = heap[0]
+            if key not in rects:
+                heapq.heappop(heap) # Already packed
+            elif version == pbin._version:
+                return key
+            else:
+                fitness = pbin.fitness(rects[key][0], rects[key][1])
+                if fitness is None:
+                    heapq.heappop(heap)
+                else:
+                    heapq.heapreplace(heap, (fitness, key, pbin._version))
+        return None
 
     def _new_open_bin(self, remaining_rect):
         """
@@ -467,21 +1238,21 @@ class PackerGlobal(Packer, PackerBNFMixin):
 
         return new_bin 
 
-    def pack(self):
-       
-        self.reset()
+    def _shard_options(self):
+        return {'pack_algo': self._pack_algo, 'rotation': self._rotation,
+                'lazy': self._lazy}
 
-        if not self._is_everything_ready():
-            return
+    def _pack(self, bins, rects):
         
         # Add available bins to packer
-        for b in self._avail_bins:
+        for b in bins:
             width, height, count, extra_kwargs = b
             super(Packer, self).add_bin(width, height, count, **extra_kwargs)
     
         # Store rectangles into dict for fast deletion
-        self._sorted_rect = collections.OrderedDict(
-                enumerate(self._sort_algo(self._avail_rect)))
+        self._sorted_rect = collections.OrderedDict(enumerate(rects))
+        self._rect_index = RectSizeIndex((k, r[0], r[1]) 
+                for k, r in self._sorted_rect.items())
         
         # For each bin pack the rectangles with lowest fitness until it is filled or
         # the rectangles exhausted, then open the next bin where at least one rectangle 
@@ -494,11 +1265,18 @@ class PackerGlobal(Packer, PackerBNFMixin):
             if pbin is None:
                 break
 
+            heap = None
+            if self._lazy and pbin.monotone_fitness:
+                heap = self._fitness_heap(pbin)
+
             # Pack as many rectangles as possible into the open bin
             while True:
               
                 # Find 'fittest' rectangle
-                best_rect_key = self._find_best_fit(pbin)
+                if heap is None:
+                    best_rect_key = self._find_best_fit(pbin)
+                else:
+                    best_rect_key = self._find_best_fit_lazy(pbin, heap)
                 if best_rect_key is None:
                     closed_bin = self._open_bins.popleft()
                     self._closed_bins.append(closed_bin)
@@ -506,6 +1284,7 @@ class PackerGlobal(Packer, PackerBNFMixin):
 
                 best_rect = self._sorted_rect[best_rect_key]
                 del self._sorted_rect[best_rect_key]
+                self._rect_index.remove(best_rect_key, best_rect[0], best_rect[1])
 
                 PackerBNFMixin.add_rect(self, *best_rect)
 
@@ -513,6 +1292,29 @@ class PackerGlobal(Packer, PackerBNFMixin):
 
 
 
+def _pack_shard(packer_class, options, bins, widths, heights):
+    """
+    Pack one shard of rectangles, runs in the executor. The bin and rectangle
+    indexes are used as ids so results can be matched with the originals.
+
+    Returns:
+        tuple: ([(bin index, [(x, y, w, h, rect index), ...]), ...], 
+            set of packed rect indexes)
+    """
+    packer = packer_class(**options)
+    for i, (width, height, count, kwargs) in enumerate(bins):
+        if count > 0:
+            packer.add_bin(width, height, count, bid=i, **kwargs)
+    packer.add_rects(widths, heights, range(len(widths)))
+    packer.pack()
+
+    packed_bins = [(b.bid, [(r.x, r.y, r.width, r.height, r.rid) for r in b])
+            for b in packer]
+    packed_rects = set(r[5] for r in packer.rect_list())
+    return packed_bins, packed_rects
+
+
+
 # Packer factory
 class Enum(tuple): 
     __getattr__ = tuple.index
@@ -525,7 +1327,9 @@ def newPacker(mode=PackingMode.Offline,
          bin_algo=PackingBin.BBF, 
         pack_algo=MaxRectsBssf,
         sort_algo=SORT_AREA, 
-        rotation=True):
+        rotation=True,
+        saturation=None,
+        sink=None):
     """
     Packer factory helper function
 
@@ -536,6 +1340,11 @@ def newPacker(mode=PackingMode.Offline,
         bin_algo (PackingBin): Bin selection heuristic
         pack_algo (PackingAlgorithm): Algorithm used
         rotation (boolean): Enable or disable rectangle rotation. 
+        saturation (bool, tuple): BFF and BBF only, close bins where the 
+            smallest remaining rectangle (True, offline mode only) or a
+            rectangle of (width, height) dimensions can no longer be placed.
+        sink (callable): Online mode only, closed bins are passed to sink
+            and released by the packer.
 
     Returns:
         Packer: Initialized packer instance.
@@ -571,10 +1380,23 @@ def newPacker(mode=PackingMode.Offline,
     else:
         raise AttributeError("Unknown packing mode.")
 
+    kwargs = {}
+    if saturation:
+        if bin_algo not in (PackingBin.BFF, PackingBin.BBF):
+            raise AttributeError("Saturation only supported by BFF and BBF")
+        if saturation is True and mode == PackingMode.Online:
+            raise AttributeError("Online saturation requires a rectangle size")
+        kwargs['saturation'] = saturation
+
+    if sink is not None:
+        if mode != PackingMode.Online:
+            raise AttributeError("Sink only supported in online mode")
+        kwargs['sink'] = sink
+
     if sort_algo:
         return packer_class(pack_algo=pack_algo, sort_algo=sort_algo, 
-            rotation=rotation)
+            rotation=rotation, **kwargs)
     else:
-        return packer_class(pack_algo=pack_algo, rotation=rotation)
+        return packer_class(pack_algo=pack_algo, rotation=rotation, **kwargs)
 
 
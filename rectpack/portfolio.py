@@ -0,0 +1,127 @@
+from .packer import newPacker, PackingMode, PackingBin, SORT_AREA, \
+    SORT_PERI, SORT_LSIDE, SORT_SSIDE
+from .maxrects import MaxRectsBssf, MaxRectsBaf, MaxRectsBlsf, MaxRectsBl
+
+import collections
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from timeit import default_timer as timer
+
+
+
+# Result of packing the rectangles with one of the candidates
+CandidateResult = collections.namedtuple('CandidateResult',
+        ['candidate', 'bins', 'rects', 'area', 'time'])
+
+# pack_best return value
+PackBestResult = collections.namedtuple('PackBestResult',
+        ['packer', 'candidate', 'results'])
+
+
+def candidate_product(pack_algos, sort_algos, bin_algos, rotation=True):
+    """
+    Generate the list of candidates with all the combinations of packing
+    algorithm, sort algorithm, and bin selection heuristic. Global bin
+    selection doesn't sort the rectangles so only one candidate is generated
+    for each packing algorithm.
+
+    Arguments:
+        pack_algos (list): Packing algorithm classes
+        sort_algos (list): Sort algorithms (SORT_AREA, ...)
+        bin_algos (list): Bin selection heuristics (PackingBin.BFF, ...)
+        rotation (bool): Enable or disable rectangle rotation
+
+    Returns:
+        list: Candidates, each one a dict of newPacker keyword arguments
+    """
+    sort_algos = list(sort_algos)
+    candidates = []
+    for pack_algo, bin_algo in itertools.product(pack_algos, bin_algos):
+        sorts = sort_algos if bin_algo != PackingBin.Global else sort_algos[:1]
+        for sort_algo in sorts:
+            candidates.append({'pack_algo': pack_algo, 'sort_algo': sort_algo,
+                'bin_algo': bin_algo, 'rotation': rotation})
+    return candidates
+
+
+DEFAULT_CANDIDATES = candidate_product(
+        [MaxRectsBssf, MaxRectsBaf, MaxRectsBlsf, MaxRectsBl],
+        [SORT_AREA, SORT_PERI, SORT_LSIDE, SORT_SSIDE],
+        [PackingBin.BFF, PackingBin.BBF])
+
+
+def _new_packer(rects, bins, candidate):
+    """Create offline packer for the candidate and pack the rectangles"""
+    packer = newPacker(mode=PackingMode.Offline, **candidate)
+    for b in bins:
+        packer.add_bin(*b)
+    for r in rects:
+        packer.add_rect(*r)
+    packer.pack()
+    return packer
+
+
+def _pack_candidate(rects, bins, candidate):
+    """
+    Pack the rectangles with one candidate, runs in the executor.
+
+    Returns:
+        tuple: (bins used, rectangles packed, total bin area, time)
+    """
+    start = timer()
+    packer = _new_packer(rects, bins, candidate)
+    elapsed = timer()-start
+    area = sum(w*h for w, h in packer.bin_list())
+    return len(packer), len(packer.rect_list()), area, elapsed
+
+
+def pack_best(rects, bins, candidates=None, max_workers=None, executor=None):
+    """
+    Pack the rectangles with each one of the candidate packer configurations
+    in parallel, and return a packer with the best result.
+
+    The best candidate is the one that packs the most rectangles, using the
+    fewest bins, and the smallest total bin area. If there is still a tie
+    the first candidate in the list wins, so the selection doesn't depend
+    on the order the candidates finish.
+
+    Arguments:
+        rects (list): Rectangles [(width, height[, rid]), ...]
+        bins (list): Bins [(width, height[, count]), ...]
+        candidates (list): newPacker keyword argument dicts, mode is always
+            offline. DEFAULT_CANDIDATES if None.
+        max_workers (int): Max number of processes, by default the number
+            of processors.
+        executor (concurrent.futures.Executor): Use this executor instead of
+            creating a process pool, it isn't shut down after packing.
+
+    Returns:
+        PackBestResult: (packer, candidate, results) tuple, where packer is
+            the winner packer with all the rectangles packed again in the
+            calling process, candidate its configuration, and results a
+            CandidateResult (candidate, bins, rects, area, time) for each
+            candidate in the same order they were provided.
+    """
+    rects = list(rects)
+    bins = list(bins)
+    candidates = list(DEFAULT_CANDIDATES if candidates is None else candidates)
+    if not candidates:
+        raise AttributeError("At least one candidate is required")
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    try:
+        futures = [executor.submit(_pack_candidate, rects, bins, c)
+                for c in candidates]
+        results = [CandidateResult(c, *f.result())
+                for c, f in zip(candidates, futures)]
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    best = min(range(len(results)), key=lambda i: (-results[i].rects,
+        results[i].bins, results[i].area, i))
+    packer = _new_packer(rects, bins, candidates[best])
+    return PackBestResult(packer, candidates[best], results)
@@ -1,11 +1,9 @@
 import collections
 import itertools
-import operator
 import heapq
-import copy
+import bisect
 from .pack_algo import PackingAlgorithm
-from .geometry import Point as P
-from .geometry import HSegment, Rectangle
+from .geometry import Rectangle
 from .waste import WasteManager
 
 
@@ -13,28 +11,41 @@ class Skyline(PackingAlgorithm):
     """ Class implementing Skyline algorithm as described by
     Jukka Jylanki - A Thousand Ways to Pack the Bin (February 27, 2010)
 
-    _skyline:  stores all the segments at the top of the skyline.
+    _skyline_left, _skyline_right, _skyline_top: store all the segments at 
+        the top of the skyline.
     _waste: Handles all wasted sections.
     """
 
+    # Max number of rectangle sizes with cached placement
+    PLACEMENT_CACHE_SIZE = 1024
+
+    # Max number of skyline changes a cached placement can be updated with,
+    # older ones are evaluated again from scratch.
+    PLACEMENT_CACHE_CHANGES = 16
+
     def __init__(self, width, height, rot=True, *args, **kwargs):
         """
-        _skyline is the list used to store all the skyline segments, each 
-        one is a list with the format [x, y, width] where x is the x
-        coordinate of the left most point of the segment, y the y coordinate
-        of the segment, and width the length of the segment. The initial 
-        segment is allways [0, 0, surface_width]
+        The skyline segments are stored in three parallel lists, 
+        _skyline_left with the x coordinate of the left most point of each
+        segment, _skyline_right with the x coordinate of the right most point,
+        and _skyline_top with the y coordinate of the segment. Segments are 
+        sorted from left to right, and adjacent segments never have the same 
+        height. The initial segment is allways (0, surface_width, 0)
         
         Arguments:
             width (int, float): 
             height (int, float):
             rot (bool): Enable or disable rectangle rotation
+            min_waste (tuple): Optional keyword argument, (width, height) 
+                wasted sections where a rectangle of this size doesn't fit 
+                are discarded, only used by the waste management variants.
         """
         self._waste_management = False
-        self._waste = WasteManager(rot=rot)
+        self._waste = WasteManager(rot=rot, 
+                min_size=kwargs.pop('min_waste', None))
         super(Skyline, self).__init__(width, height, rot, merge=False, *args, **kwargs)
 
-    def _placement_points_generator(self, skyline, width):
+    def _placement_points_generator(self, width, lo=None, hi=None):
         """Returns a generator for the x coordinates of all the placement
         points on the skyline for a given rectangle.
 
@@ -42,31 +53,44 @@ class Skyline(PackingAlgorithm):
         to compute them twice than to remove them.
         
         Arguments:
-            skyline (list): Skyline HSegment list
             width (int, float): Rectangle width
+            lo (int, float): If not None only points >= lo are generated
+            hi (int, float): If not None only points <= hi are generated
 
         Returns:
             generator
         """ 
-        skyline_r = skyline[-1].right
-        skyline_l = skyline[0].left
+        lefts = self._skyline_left
+        rights = self._skyline_right
+        skyline_r = rights[-1]
+        skyline_l = lefts[0]
 
-        # Placements using skyline segment left point
-        ppointsl = (s.left for s in skyline if s.left+width <= skyline_r)
+        if lo is None:
+            # Placements using skyline segment left point
+            ppointsl = (l for l in lefts if l+width <= skyline_r)
+
+            # Placements using skyline segment right point
+            ppointsr = (r-width for r in rights if r-width >= skyline_l)
+        else:
+            ppointsl = (l for l in itertools.takewhile(lambda l: l <= hi,
+                        itertools.islice(lefts, bisect.bisect_left(lefts, lo), None))
+                    if l+width <= skyline_r)
 
-        # Placements using skyline segment right point
-        ppointsr = (s.right-width for s in skyline if s.right-width >= skyline_l)
+            ppointsr = (p for p in itertools.takewhile(lambda p: p <= hi,
+                        (r-width for r in itertools.islice(rights, 
+                            bisect.bisect_left(rights, lo), None)))
+                    if p >= lo and p >= skyline_l)
 
         # Merge positions
         return heapq.merge(ppointsl, ppointsr)
 
     def _generate_placements(self, width, height):
         """
-        Generate a list with 
+        Generate a list with all the valid placements for a rectangle
 
         Arguments:
-            skyline (list): SkylineHSegment list
             width (number):
+            height (number):
 
         Returns:
             tuple (Rectangle, fitness):
@@ -74,38 +98,40 @@ class Skyline(PackingAlgorithm):
                 left_skyline: Index for the skyline under the rectangle left edge.
                 right_skyline: Index for the skyline under the rectangle right edte.
         """
-        skyline = self._skyline
+        rights = self._skyline_right
+        tops = self._skyline_top
+        nsegments = len(tops)
 
         points = collections.deque()
 
         left_index = right_index = 0 # Left and right side skyline index
-        support_height = skyline[0].top
+        support_height = tops[0]
         support_index = 0 
     
-        placements = self._placement_points_generator(skyline, width)
+        placements = self._placement_points_generator(width)
         for p in placements:
 
             # If Rectangle's right side changed segment, find new support
-            if p+width > skyline[right_index].right:
-                for right_index in range(right_index+1, len(skyline)):
-                    if skyline[right_index].top >= support_height:
+            if p+width > rights[right_index]:
+                for right_index in range(right_index+1, nsegments):
+                    if tops[right_index] >= support_height:
                         support_index = right_index
-                        support_height = skyline[right_index].top
-                    if p+width <= skyline[right_index].right:
+                        support_height = tops[right_index]
+                    if p+width <= rights[right_index]:
                         break
                 
             # If left side changed segment.
-            if p >= skyline[left_index].right:
+            if p >= rights[left_index]:
                 left_index +=1
            
             # Find new support if the previous one was shifted out.
             if support_index < left_index:
                 support_index = left_index
-                support_height = skyline[left_index].top
+                support_height = tops[left_index]
                 for i in range(left_index, right_index+1):
-                    if skyline[i].top >= support_height:
+                    if tops[i] >= support_height:
                         support_index = i
-                        support_height = skyline[i].top
+                        support_height = tops[i]
 
             # Add point if there is enought room at the top
             if support_height+height <= self.height:
@@ -114,80 +140,214 @@ class Skyline(PackingAlgorithm):
 
         return points
 
-    def _merge_skyline(self, skylineq, segment):
+    def _generate_placements_range(self, width, height, lo, hi):
         """
+        Same as _generate_placements but only for the placements with x
+        coordinate between lo and hi. Instead of sweeping the skyline from
+        the left, the segments under each placement are found by bisection.
+
         Arguments:
-            skylineq (collections.deque):
-            segment (HSegment):
+            width (number):
+            height (number):
+            lo (number): Min placement x coordinate
+            hi (number): Max placement x coordinate
+
+        Returns:
+            tuple (Rectangle, left_skyline, right_skyline)
+        """
+        rights = self._skyline_right
+        tops = self._skyline_top
+        last_index = len(tops)-1
+
+        points = collections.deque()
+    
+        placements = self._placement_points_generator(width, lo, hi)
+        for p in placements:
+
+            # Segments under the rectangle left and right side, the support
+            # is the right most of the highest.
+            left_index = bisect.bisect_right(rights, p)
+            right_index = min(bisect.bisect_left(rights, p+width), last_index)
+            support_height = max(reversed(tops[left_index:right_index+1]))
+
+            # Add point if there is enought room at the top
+            if support_height+height <= self.height:
+                points.append((Rectangle(p, support_height, width, height),\
+                    left_index, right_index))
+
+        return points
+
+    def _merge_skyline(self, segments, left, right, top):
         """
-        if len(skylineq) == 0:
-            skylineq.append(segment)
-            return
+        Append segment to a list of (left, right, top) segments, extending 
+        the last one instead if both have the same height.
 
-        if skylineq[-1].top == segment.top:
-            s = skylineq[-1]
-            skylineq[-1] = HSegment(s.start, s.length+segment.length)
+        Arguments:
+            segments (list): Segment list
+            left (number): Segment left x coordinate
+            right (number): Segment right x coordinate
+            top (number): Segment y coordinate
+        """
+        if segments and segments[-1][2] == top:
+            l, r, t = segments[-1]
+            segments[-1] = (l, l+((r-l)+(right-left)), t)
         else:
-            skylineq.append(segment)
+            segments.append((left, right, top))
 
     def _add_skyline(self, rect):
         """
+        Update the skyline segments under the rectangle, only the segments
+        between the ones under its left and right edges are modified.
+
         Arguments:
-            seg (Rectangle):
+            rect (Rectangle):
         """
-        skylineq = collections.deque([]) # Skyline after adding new one
-        
-        for sky in self._skyline:
-            if sky.right <= rect.left or sky.left >= rect.right:
-                self._merge_skyline(skylineq, sky)
-                continue
+        lefts = self._skyline_left
+        rights = self._skyline_right
+        tops = self._skyline_top
+
+        rect_left, rect_right = rect.x, rect.x+rect.width
+        rect_bottom, rect_top = rect.y, rect.y+rect.height
+
+        # Segments [first, last) are under the rectangle
+        first = bisect.bisect_right(rights, rect_left)
+        last = bisect.bisect_left(lefts, rect_right)
+
+        # Include the neighbour segments, they might be merged with the 
+        # new ones.
+        start = max(first-1, 0)
+        end = min(last+1, len(tops))
 
-            if sky.left < rect.left and sky.right > rect.left:
+        segments = [] # Skyline after adding new one
+        for i in range(start, first):
+            self._merge_skyline(segments, lefts[i], rights[i], tops[i])
+
+        for i in range(first, last):
+            left, right, top = lefts[i], rights[i], tops[i]
+
+            if left < rect_left and right > rect_left:
                 # Skyline section partially under segment left
-                self._merge_skyline(skylineq, 
-                        HSegment(sky.start, rect.left-sky.left))
-                sky = HSegment(P(rect.left, sky.top), sky.right-rect.left)
+                self._merge_skyline(segments, 
+                        left, left+(rect_left-left), top)
+                left, right = rect_left, rect_left+(right-rect_left)
             
-            if sky.left < rect.right:
-                if sky.left == rect.left:
-                    self._merge_skyline(skylineq, 
-                        HSegment(P(rect.left, rect.top), rect.width))
+            if left < rect_right:
+                if left == rect_left:
+                    self._merge_skyline(segments, 
+                        rect_left, rect_left+rect.width, rect_top)
                 # Skyline section partially under segment right
-                if sky.right > rect.right:
-                    self._merge_skyline(skylineq, 
-                        HSegment(P(rect.right, sky.top), sky.right-rect.right))
-                    sky = HSegment(sky.start, rect.right-sky.left)
+                if right > rect_right:
+                    self._merge_skyline(segments, 
+                        rect_right, rect_right+(right-rect_right), top)
+                    right = left+(rect_right-left)
             
-            if sky.left >= rect.left and sky.right <= rect.right:
+            if left >= rect_left and right <= rect_right:
                 # Skyline section fully under segment, account for wasted space
-                if self._waste_management and sky.top < rect.bottom:
-                    self._waste.add_waste(sky.left, sky.top, 
-                        sky.length, rect.bottom - sky.top)
+                if self._waste_management and top < rect_bottom:
+                    self._waste.add_waste(left, top, 
+                        right-left, rect_bottom-top)
             else:
                 # Segment
-                self._merge_skyline(skylineq, sky)
+                self._merge_skyline(segments, left, right, top)
+
+        for i in range(last, end):
+            self._merge_skyline(segments, lefts[i], rights[i], tops[i])
 
         # Aaaaand ..... Done
-        self._skyline = list(skylineq)
+        lefts[start:end] = [s[0] for s in segments]
+        rights[start:end] = [s[1] for s in segments]
+        tops[start:end] = [s[2] for s in segments]
+
+        self._skyline_version += 1
+        self._skyline_changes.append((rect_left, rect_right))
+        self._free_space_changed()
 
     def _rect_fitness(self, rect, left_index, right_index):
         return rect.top
 
+    def _best_placement(self, width, height, ranges=None, best=None):
+        """
+        Evaluate the fitness of the placements for the rectangle, in both 
+        orientations if rotation is enabled, and return the best one.
+
+        Placements are compared by (fitness, rotated, x), the same order
+        they would have if evaluated one after the other keeping the first
+        with the lowest fitness.
+
+        Arguments:
+            width (number): Rectangle width
+            height (number): Rectangle height
+            ranges (list): If not None, only evaluate the placements touching
+                one of the (left, right) x coordinate ranges.
+            best (tuple): Best placement found so far
+
+        Returns:
+            tuple (fitness, rotated, x, y, width, height): Best placement
+            None: Rectangle couldn't be placed
+        """
+        orientations = [(width, height)]
+        if self.rot and width != height:
+            orientations.append((height, width))
+
+        for rotated, (w, h) in enumerate(orientations):
+            if ranges is None:
+                positions = self._generate_placements(w, h)
+            else:
+                positions = itertools.chain.from_iterable(
+                    self._generate_placements_range(w, h, left-w, right) 
+                    for left, right in ranges)
+
+            for rect, left_index, right_index in positions:
+                fitness = self._rect_fitness(rect, left_index, right_index)
+                if best is None or (fitness, rotated, rect.x) < best[:3]:
+                    best = (fitness, rotated, rect.x, rect.y, w, h)
+
+        return best
+
     def _select_position(self, width, height):
         """
         Search for the placement with the bes fitness for the rectangle.
 
+        The best placement for each rectangle size is cached, when the 
+        skyline changes only the placements touching the modified section 
+        are evaluated again, unless the cached placement was one of them.
+        Floats are never cached, the result of evaluating only part of 
+        the placements could differ due to rounding.
+
         Returns:
             tuple (Rectangle, fitness) - Rectangle placed in the fittest position
             None - Rectangle couldn't be placed
         """
-        positions = self._generate_placements(width, height)
-        if self.rot and width != height:
-            positions += self._generate_placements(height, width)
-        if not positions:
+        cacheable = self._cacheable and \
+            not isinstance(width, float) and not isinstance(height, float)
+        entry = self._placement_cache.get((width, height)) if cacheable else None
+    
+        if entry is None:
+            best = self._best_placement(width, height)
+        else:
+            version, best = entry
+            changes = self._skyline_version-version
+            if changes > len(self._skyline_changes):
+                best = self._best_placement(width, height)
+            elif changes:
+                ranges = list(self._skyline_changes)[-changes:]
+                if best is not None and any(best[2]+best[4] >= left and 
+                        best[2] <= right for left, right in ranges):
+                    # Best placement was modified
+                    best = self._best_placement(width, height)
+                else:
+                    best = self._best_placement(width, height, ranges, best)
+
+        if cacheable:
+            if len(self._placement_cache) >= self.PLACEMENT_CACHE_SIZE:
+                self._placement_cache.clear()
+            self._placement_cache[(width, height)] = (self._skyline_version, best)
+
+        if best is None:
             return None, None
-        return min(((p[0], self._rect_fitness(*p))for p in positions), 
-                key=operator.itemgetter(1))
+
+        fitness, _, x, y, w, h = best
+        return Rectangle(x, y, w, h), fitness
 
     def fitness(self, width, height):
         """Search for the best fitness 
@@ -204,7 +364,11 @@ class Skyline(PackingAlgorithm):
 
         # Get best fitness segment, for normal rectangle, and for
         # rotated rectangle if rotation is enabled.
-        rect, fitness = self._select_position(width, height)
+        try:
+            rect, fitness = self._fitness_memo[(width, height)]
+        except KeyError:
+            rect, fitness = self._memoize_selection(width, height,
+                self._select_position(width, height))
         return fitness
 
     def add_rect(self, width, height, rid=None):
@@ -220,10 +384,16 @@ class Skyline(PackingAlgorithm):
         # If Waste managment is enabled, first try to place the rectangle there
         if self._waste_management:
             rect = self._waste.add_rect(width, height, rid)
+            if rect:
+                self._version += 1
 
-        # Get best possible rectangle position
+        # Get best possible rectangle position, unless it was already
+        # selected by fitness()
         if not rect:
-            rect, _ = self._select_position(width, height)
+            try:
+                rect, _ = self._fitness_memo.pop((width, height))
+            except KeyError:
+                rect, _ = self._select_position(width, height)
             if rect:
                 self._add_skyline(rect)
 
@@ -232,14 +402,52 @@ class Skyline(PackingAlgorithm):
         
         # Store rectangle, and recalculate skyline
         rect.rid = rid
-        self.rectangles.append(rect)
+        self._place(rect, rect.width != width)
         return rect
 
+    def free_regions(self):
+        lefts, rights, tops = self._skyline_left, self._skyline_right, \
+                self._skyline_top
+
+        # Float coordinates may not add up exactly, don't risk 
+        # underestimating the free space.
+        if not self._cacheable or any(isinstance(v, float) 
+                for v in itertools.chain(lefts, rights, tops)):
+            return [(self.width, self.height)]
+
+        # Largest rectangle over each segment, expanding it over the 
+        # neighbouring segments with the same or lower top
+        regions = []
+        for i, top in enumerate(tops):
+            if top >= self.height:
+                continue
+            first = last = i
+            while first > 0 and tops[first-1] <= top:
+                first -= 1
+            while last < len(tops)-1 and tops[last+1] <= top:
+                last += 1
+            regions.append((rights[last]-lefts[first], self.height-top))
+
+        if self._waste_management:
+            regions.extend(self._waste.free_regions())
+        return regions
+
     def reset(self):
         super(Skyline, self).reset()
-        self._skyline = [HSegment(P(0, 0), self.width)]
+        self._skyline_left = [0]
+        self._skyline_right = [self.width]
+        self._skyline_top = [0]
         self._waste.reset()
 
+        # Best placement cache, and the x coordinate ranges of the last
+        # changes to the skyline.
+        self._cacheable = not isinstance(self.width, float) and \
+                not isinstance(self.height, float)
+        self._placement_cache = {}
+        self._skyline_version = 0
+        self._skyline_changes = collections.deque(
+                maxlen=self.PLACEMENT_CACHE_CHANGES)
+
 
 
 
@@ -255,17 +463,17 @@ class SkylineMwf(Skyline):
     rectangle.
     """
     def _rect_fitness(self, rect, left_index, right_index):
+        rect_left, rect_right = rect.x, rect.x+rect.width
         waste = 0
-        for seg in self._skyline[left_index:right_index+1]:
+        for left, right, top in zip(self._skyline_left[left_index:right_index+1],
+                self._skyline_right[left_index:right_index+1],
+                self._skyline_top[left_index:right_index+1]):
             waste +=\
-                (min(rect.right, seg.right)-max(rect.left, seg.left)) *\
-                (rect.bottom-seg.top)
+                (min(rect_right, right)-max(rect_left, left)) *\
+                (rect.y-top)
 
         return waste
 
-    def _rect_fitnes2s(self, rect, left_index, right_index):
-        waste = ((min(rect.right, seg.right)-max(rect.left, seg.left)) for seg in self._skyline[left_index:right_index+1])
-        return sum(waste)
 
 class SkylineMwfl(Skyline):
     """Implements Min Waste fit with low profile heuritic, minimizing the area
@@ -273,11 +481,14 @@ class SkylineMwfl(Skyline):
     minimal.
     """ 
     def _rect_fitness(self, rect, left_index, right_index):
+        rect_left, rect_right = rect.x, rect.x+rect.width
         waste = 0
-        for seg in self._skyline[left_index:right_index+1]:
+        for left, right, top in zip(self._skyline_left[left_index:right_index+1],
+                self._skyline_right[left_index:right_index+1],
+                self._skyline_top[left_index:right_index+1]):
             waste +=\
-                (min(rect.right, seg.right)-max(rect.left, seg.left)) *\
-                (rect.bottom-seg.top)
+                (min(rect_right, right)-max(rect_left, left)) *\
+                (rect.y-top)
 
         return waste*self.width*self.height+rect.top
 
@@ -287,6 +498,9 @@ class SkylineBl(Skyline):
     results in which the top side of the rectangle lies at the bottom-most 
     position.
     """
+    # The skyline only grows, so the lowest placement can't get lower
+    monotone_fitness = True
+
     def _rect_fitness(self, rect, left_index, right_index):
         return rect.top
 
@@ -294,7 +508,8 @@ class SkylineBl(Skyline):
 
 
 class SkylineBlWm(SkylineBl, SkylineWMixin):
-    pass
+    # Placements into new waste sections have 0 fitness
+    monotone_fitness = False
 
 class SkylineMwfWm(SkylineMwf, SkylineWMixin):
     pass
@@ -0,0 +1,148 @@
+import array
+from .geometry import Rectangle
+
+
+def typed_column(values):
+    """
+    Return typed array with the values when all of them are int or all of
+    them float, otherwise return the values list.
+
+    Arguments:
+        values (list): Column values
+    """
+    if not values:
+        return values
+    if type(values[0]) is int:
+        # Faster than checking the type of each value, fails if any of
+        # them isn't an integer.
+        try:
+            return array.array('q', values)
+        except (TypeError, OverflowError):
+            return values
+    if all(type(v) is float for v in values):
+        return array.array('d', values)
+    return values
+
+
+def concat_columns(columns):
+    """
+    Concatenate typed arrays and lists, the result is a typed array when all
+    of them are arrays with the same typecode, and a list otherwise.
+
+    Arguments:
+        columns (list): Columns to concatenate, empty ones are ignored
+
+    Returns:
+        array.array, list: New column
+    """
+    columns = [c for c in columns if len(c)]
+    typecodes = set(getattr(c, 'typecode', None) for c in columns)
+    if len(typecodes) == 1 and None not in typecodes:
+        result = array.array(typecodes.pop())
+    else:
+        result = []
+    for c in columns:
+        result.extend(c)
+    return result
+
+
+
+class RectangleStore(object):
+    """List-like container for placed rectangles storing each attribute in
+    its own column instead of one Rectangle object per placement.
+
+    Integer and float coordinates are stored in typed arrays, any other
+    number type (Decimal, ...) falls back to a plain list for that column
+    so values are always returned unchanged. Indexing or iterating over
+    the store returns new Rectangle instances, modifying them doesn't
+    modify the stored placement.
+    """
+
+    _typecodes = {int: 'q', float: 'd'}
+
+    def __init__(self, rects=()):
+        """
+        Arguments:
+            rects (list): Initial rectangles
+        """
+        self.x = None
+        self.y = None
+        self.width = None
+        self.height = None
+        self.rid = []
+
+        for r in rects:
+            self.append(r)
+
+    def _new_column(self, value):
+        typecode = self._typecodes.get(type(value))
+        if typecode is None:
+            return []
+        return array.array(typecode)
+
+    def _append_value(self, name, value):
+        column = getattr(self, name)
+        if column is None:
+            column = self._new_column(value)
+            setattr(self, name, column)
+        elif isinstance(column, array.array) and \
+                self._typecodes.get(type(value)) != column.typecode:
+            column = list(column)
+            setattr(self, name, column)
+        column.append(value)
+
+    def append(self, rect):
+        """
+        Store rectangle placement.
+
+        Arguments:
+            rect (Rectangle): Placed rectangle
+        """
+        self._append_value('x', rect.x)
+        self._append_value('y', rect.y)
+        self._append_value('width', rect.width)
+        self._append_value('height', rect.height)
+        self.rid.append(rect.rid)
+
+    def _rectangle(self, i):
+        return Rectangle(self.x[i], self.y[i], self.width[i], self.height[i],
+                self.rid[i])
+
+    def __len__(self):
+        return len(self.rid)
+
+    def __iter__(self):
+        for i in range(len(self.rid)):
+            yield self._rectangle(i)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._rectangle(i) for i in range(*key.indices(len(self)))]
+
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("Index out of range")
+        return self._rectangle(key)
+
+    def columns(self):
+        """
+        Return the store columns without copying them, so they must not be
+        modified.
+
+        Returns:
+            tuple: (x, y, width, height, rid) typed arrays or lists
+        """
+        return tuple(c if c is not None else [] for c in
+                (self.x, self.y, self.width, self.height, self.rid))
+
+    def rect_list(self):
+        """
+        Returns a list with all rectangles in the store.
+
+        Returns:
+            List: Format [(x, y, width, height, rid), ...]
+        """
+        if not self.rid:
+            return []
+        return list(zip(self.x, self.y, self.width, self.height, self.rid))
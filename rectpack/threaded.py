@@ -0,0 +1,231 @@
+from .maxrects import MaxRectsBssf
+from .packer import PackerOnline
+
+import threading
+
+
+
+class PackerConcurrent(PackerOnline):
+    """
+    Online packer that can be called from several threads at once. Each
+    open bin has its own lock, so rectangles placed into different bins
+    don't wait for each other, and a factory lock is only held while bins
+    are opened or closed.
+
+    With a single thread the packing is the same as the online packer
+    with the same bin selection heuristic.
+    """
+
+    def __init__(self, pack_algo=MaxRectsBssf, rotation=True, saturation=None,
+            sink=None):
+        self._factory_lock = threading.RLock()
+        super(PackerConcurrent, self).__init__(pack_algo=pack_algo,
+                rotation=rotation, saturation=saturation, sink=sink)
+
+    def __iter__(self):
+        with self._factory_lock:
+            return iter(list(super(PackerConcurrent, self).__iter__()))
+
+    def __len__(self):
+        with self._factory_lock:
+            return super(PackerConcurrent, self).__len__()
+
+    def __getitem__(self, key):
+        with self._factory_lock:
+            return super(PackerConcurrent, self).__getitem__(key)
+
+    def _indexed_bins(self):
+        with self._factory_lock:
+            return super(PackerConcurrent, self)._indexed_bins()
+
+    def reset(self):
+        with self._factory_lock:
+            super(PackerConcurrent, self).reset()
+
+            # Open bins lock by bin id, removed when the bin is closed
+            self._bin_locks = {}
+
+            # Open bins tuple, replaced instead of modified so it can be
+            # iterated without holding the factory lock
+            self._open = ()
+
+    def add_bin(self, width, height, count=1, **kwargs):
+        with self._factory_lock:
+            super(PackerConcurrent, self).add_bin(width, height, count,
+                    **kwargs)
+
+    def _lock_open_bin(self, pbin):
+        """
+        Acquire bin lock, returns the lock or None if the bin was closed
+        """
+        lock = self._bin_locks.get(id(pbin))
+        if lock is None:
+            return None
+        lock.acquire()
+        if self._bin_locks.get(id(pbin)) is not lock:
+            lock.release()
+            return None
+        return lock
+
+    def _add_to_new_bin(self, width, height, rid, seen):
+        """
+        Open a new bin and place the rectangle in it.
+
+        Arguments:
+            seen (tuple): Open bins checked by the caller, if a bin was
+                opened meanwhile no new bin is opened.
+
+        Returns:
+            tuple: (bin, rectangle) placement
+            None: No bin where the rectangle fits is left
+            False: Bins were opened or closed, try again with open bins.
+        """
+        with self._factory_lock:
+            if self._open is not seen:
+                return False
+
+            while True:
+                new_bin = self._new_open_bin(width, height, rid=rid)
+                if new_bin is None:
+                    return None
+                # The rectangle is placed before the bin is published to
+                # other threads, nobody else can access it until then.
+                rect = new_bin.add_rect(width, height, rid)
+                self._bin_locks[id(new_bin)] = threading.Lock()
+                self._open = self._open + (new_bin,)
+                if rect is not None:
+                    break
+
+        self._close_if_saturated(new_bin)
+        return new_bin, rect
+
+    def _close_if_saturated(self, pbin):
+        """Close bin if the saturation policy is enabled and it's full"""
+        if self._saturation_size is None:
+            return
+        lock = self._lock_open_bin(pbin)
+        if lock is None:
+            return
+        try:
+            saturated = self._is_saturated(pbin)
+            if saturated:
+                self._remove_open_bin(pbin)
+        finally:
+            lock.release()
+        if saturated:
+            self._release_closed(pbin)
+
+    def _remove_open_bin(self, pbin):
+        """Remove open bin from the open bins, holding the bin lock"""
+        with self._factory_lock:
+            del self._bin_locks[id(pbin)]
+            self._open_bins.remove(pbin)
+            self._open = tuple(self._open_bins)
+            if self._sink is None:
+                self._closed_bins.append(pbin)
+            else:
+                self._released_count += 1
+
+    def _release_closed(self, pbin):
+        # The sink is called without holding any lock
+        if self._sink is not None:
+            try:
+                self._sink(pbin)
+            finally:
+                with self._factory_lock:
+                    del self._bin_index[id(pbin)]
+
+    def _close_bin(self, pbin):
+        lock = self._lock_open_bin(pbin)
+        if lock is None:
+            return
+        try:
+            self._remove_open_bin(pbin)
+        finally:
+            lock.release()
+        self._release_closed(pbin)
+
+    def flush(self):
+        for pbin in self._open:
+            self._close_bin(pbin)
+
+    def add_rect(self, width, height, rid=None):
+        """
+        Returns:
+            Rectangle: Placed rectangle or None if it couldn't be packed
+        """
+        placement = self._add_rect(width, height, rid)
+        return placement[1] if placement else None
+
+
+
+class PackerConcurrentBFF(PackerConcurrent):
+    """
+    BFF (Bin First Fit): Pack rectangle in first bin it fits
+    """
+
+    def _add_rect(self, width, height, rid=None):
+        """Returns (bin, rectangle) placement or None"""
+        while True:
+            bins = self._open
+            for b in bins:
+                lock = self._lock_open_bin(b)
+                if lock is None:
+                    continue
+                try:
+                    rect = b.add_rect(width, height, rid)
+                finally:
+                    lock.release()
+                if rect is not None:
+                    self._close_if_saturated(b)
+                    return b, rect
+
+            placement = self._add_to_new_bin(width, height, rid, bins)
+            if placement is not False:
+                return placement
+
+
+
+class PackerConcurrentBBF(PackerConcurrent):
+    """
+    BBF (Bin Best Fit): Pack rectangle in bin that gives best fitness
+    """
+
+    def _best_fit(self, bins, width, height):
+        """Return the open bin with the best fitness or None"""
+        best = None
+        for b in bins:
+            lock = self._lock_open_bin(b)
+            if lock is None:
+                continue
+            try:
+                fitness = b.fitness(width, height)
+            finally:
+                lock.release()
+            # Ties go to the first opened bin
+            if fitness is not None and (best is None or fitness < best[0]):
+                best = (fitness, b)
+        return best[1] if best else None
+
+    def _add_rect(self, width, height, rid=None):
+        """Returns (bin, rectangle) placement or None"""
+        while True:
+            bins = self._open
+            best_bin = self._best_fit(bins, width, height)
+            if best_bin is not None:
+                lock = self._lock_open_bin(best_bin)
+                if lock is None:
+                    continue # Closed, try again
+                try:
+                    rect = best_bin.add_rect(width, height, rid)
+                finally:
+                    lock.release()
+                if rect is not None:
+                    self._close_if_saturated(best_bin)
+                    return best_bin, rect
+                # Another thread filled the space, try again
+                continue
+
+            placement = self._add_to_new_bin(width, height, rid, bins)
+            if placement is not False:
+                return placement
@@ -6,12 +6,35 @@ from .geometry import Rectangle
 class WasteManager(GuillotineBafMinas):
 
     def __init__(self, rot=True, merge=True, *args, **kwargs):
+        """
+        Arguments:
+            rot (bool): Rectangle rotation enabled or disabled
+            merge (bool): Merge adjacent waste sections
+            min_size (tuple): Optional keyword argument, (width, height) waste
+                sections where a rectangle of this size doesn't fit are 
+                discarded after merging them, so the unusable slivers don't
+                accumulate. None keeps all.
+        """
+        self._min_size = kwargs.pop('min_size', None)
         super(WasteManager, self).__init__(1, 1, rot=rot, merge=merge, *args, **kwargs)
    
     def add_waste(self, x, y, width, height):
         """Add new waste section"""
         self._add_section(Rectangle(x, y, width, height))
 
+    def _is_usable(self, section):
+        """Test a rectangle of min_size fits into the section"""
+        width, height = self._min_size
+        if width <= section.width and height <= section.height:
+            return True
+        return self.rot and height <= section.width and width <= section.height
+
+    def _add_section(self, section):
+        super(WasteManager, self)._add_section(section)
+        # The section was joined in place with its neighbours
+        if self._min_size is not None and not self._is_usable(section):
+            self._free.remove(section)
+
     def _fits_surface(self, width, height):
         raise NotImplementedError
 
@@ -0,0 +1,99 @@
+from unittest import TestCase
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import rectpack.packer as packer
+from rectpack.aio import AsyncPacker
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Thread executor counting the number of batches submitted"""
+
+    def __init__(self, *args, **kwargs):
+        super(CountingExecutor, self).__init__(*args, **kwargs)
+        self.count = 0
+
+    def submit(self, *args, **kwargs):
+        self.count += 1
+        return super(CountingExecutor, self).submit(*args, **kwargs)
+
+
+def run(coroutine):
+    """Run coroutine in a new event loop (asyncio.run requires python 3.7)"""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAsyncPacker(TestCase):
+
+    def test_add_rect(self):
+        # Concurrent rectangles are packed in order, same as a regular packer
+        rnd = random.Random(3)
+        rects = [(rnd.randint(5, 50), rnd.randint(5, 50), i) for i in range(60)]
+
+        expected = packer.PackerOnlineBBF()
+        expected.add_bin(100, 100, count=float('inf'))
+        for r in rects:
+            expected.add_rect(*r)
+
+        async def pack():
+            p = packer.PackerOnlineBBF()
+            p.add_bin(100, 100, count=float('inf'))
+            async with AsyncPacker(p) as ap:
+                placements = await asyncio.gather(*[ap.add_rect(*r)
+                    for r in rects])
+            return p, placements
+
+        p, placements = run(pack())
+        self.assertEqual(p.rect_list(), expected.rect_list())
+        for r, (pbin, rect) in zip(rects, placements):
+            self.assertEqual(rect.rid, r[2])
+            self.assertTrue(rect in pbin)
+
+    def test_batching(self):
+        # Rectangles added in the same window are packed together
+        executor = CountingExecutor(max_workers=2)
+
+        async def pack():
+            p = packer.PackerOnlineBFF()
+            ap = AsyncPacker(p, window=0.05, executor=executor)
+            first = await asyncio.gather(ap.add_bin(20, 20, count=2),
+                ap.add_rect(20, 20), ap.add_rect(20, 20), ap.add_rect(5, 5))
+            second = await ap.add_rect(10, 10)
+            await ap.close()
+            return p, first, second
+
+        p, first, second = run(pack())
+        self.assertEqual(executor.count, 2)
+        self.assertEqual(first[0], None)
+        self.assertEqual(first[3], None) # No bins left
+        self.assertEqual(second, None)
+        self.assertEqual(len(p.rect_list()), 2)
+
+        # The executor isn't shut down
+        self.assertEqual(executor.submit(abs, -1).result(), 1)
+        executor.shutdown()
+
+    def test_exception(self):
+        # Exceptions are only raised by the call that caused them
+        async def pack():
+            p = packer.PackerOnlineBNF()
+            p.add_bin(20, 20)
+            async with AsyncPacker(p) as ap:
+                return await asyncio.gather(ap.add_rect(0, 10),
+                        ap.add_rect(10, 10), return_exceptions=True)
+
+        error, (pbin, rect) = run(pack())
+        self.assertTrue(isinstance(error, AssertionError))
+        self.assertEqual((rect.x, rect.y, rect.width, rect.height),
+                (0, 0, 10, 10))
+
+    def test_init(self):
+        with self.assertRaises(AttributeError):
+            AsyncPacker(packer.PackerBBF())
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            with self.assertRaises(AttributeError):
+                AsyncPacker(packer.PackerOnlineBBF(), executor=executor)
@@ -0,0 +1,162 @@
+import random
+from unittest import TestCase
+from timeit import default_timer as timer
+
+from rectpack import MaxRectsBl, MaxRectsBssf, MaxRectsBaf, MaxRectsBlsf
+from rectpack import SkylineBl, SkylineMwf, GuillotineBssfSas
+from rectpack import newPacker, PackingMode, PackingBin
+from rectpack.packer import PackerGlobal
+from rectpack.geometry import Rectangle
+
+
+def random_rectangles(num, min_side, max_side, seed=33):
+    rnd = random.Random(seed)
+    return [(rnd.randint(min_side, max_side), rnd.randint(min_side, max_side))
+            for _ in range(num)]
+
+
+class TestMaxRectsOccupancy(TestCase):
+    """Measure how add_rect time grows as the bin fills up, set log
+    to True to print the time used by each batch of rectangles"""
+
+    def setUp(self):
+        self.rectangles = random_rectangles(300, 5, 30)
+        self.batch = 100
+        self.algos = [MaxRectsBl, MaxRectsBssf, MaxRectsBaf, MaxRectsBlsf]
+        self.log = False
+
+    def test_add_rect_occupancy(self):
+        for algo in self.algos:
+            m = algo(500, 500)
+            for n in range(0, len(self.rectangles), self.batch):
+                start = timer()
+                for r in self.rectangles[n:n+self.batch]:
+                    m.add_rect(*r)
+                end = timer()
+
+                if self.log:
+                    print("{0:<15s} {1:>6} rects {2:>6} max_rects {3:>10.4f}s".format(
+                        algo.__name__, len(m), len(m._max_rects), end-start))
+
+            self.assertEqual(len(m), len(self.rectangles))
+            m.validate_packing()
+
+
+def intersects_by_edges(r1, r2):
+    """Reference intersects going through the edge properties, the way
+    Rectangle.intersects used to be implemented"""
+    return not (r1.bottom >= r2.top or r1.top <= r2.bottom or
+            r1.left >= r2.right or r1.right <= r2.left)
+
+
+def contains_by_edges(r1, r2):
+    """Reference contains using the edge properties"""
+    return (r2.bottom >= r1.bottom and r2.left >= r1.left and
+            r2.top <= r1.top and r2.right <= r1.right)
+
+
+class TestRectangleThroughput(TestCase):
+    """Compare intersects/contains throughput against the edge property
+    based implementations, set log to True to print the results"""
+
+    def setUp(self):
+        rnd = random.Random(33)
+        self.rectangles = [Rectangle(rnd.randint(0, 100), rnd.randint(0, 100),
+            rnd.randint(1, 50), rnd.randint(1, 50)) for _ in range(200)]
+        self.log = False
+
+    def run_pairs(self, func):
+        rects = self.rectangles
+        start = timer()
+        result = [func(r1, r2) for r1 in rects for r2 in rects]
+        return timer()-start, result
+
+    def test_intersects(self):
+        told, rold = self.run_pairs(intersects_by_edges)
+        tnew, rnew = self.run_pairs(Rectangle.intersects)
+        self.assertEqual(rold, rnew)
+        if self.log:
+            print("intersects {0:>10.4f}s edges {1:>10.4f}s inline".format(told, tnew))
+
+    def test_contains(self):
+        told, rold = self.run_pairs(contains_by_edges)
+        tnew, rnew = self.run_pairs(Rectangle.contains)
+        self.assertEqual(rold, rnew)
+        if self.log:
+            print("contains   {0:>10.4f}s edges {1:>10.4f}s inline".format(told, tnew))
+
+
+class TestBinSelection(TestCase):
+    """Measure online BBF packing time with an infinite number of bins,
+    set log to True to print the time used by each algorithm"""
+
+    def setUp(self):
+        self.rectangles = random_rectangles(600, 5, 40)
+        self.algos = [MaxRectsBssf, SkylineBl, GuillotineBssfSas]
+        self.log = False
+
+    def test_bbf_infinite_bins(self):
+        for algo in self.algos:
+            p = newPacker(mode=PackingMode.Online, bin_algo=PackingBin.BBF,
+                    pack_algo=algo)
+            p.add_bin(100, 100, count=float('inf'))
+
+            start = timer()
+            for r in self.rectangles:
+                p.add_rect(*r)
+            end = timer()
+
+            if self.log:
+                print("{0:<20s} {1:>6} bins {2:>10.4f}s".format(
+                    algo.__name__, len(p), end-start))
+
+            self.assertEqual(len(p.rect_list()), len(self.rectangles))
+            p.validate_packing()
+
+
+class EagerPackerGlobal(PackerGlobal):
+    """Reference PackerGlobal evaluating the fitness of all the remaining
+    rectangles, the way _find_best_fit used to be implemented"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs['lazy'] = False
+        super(EagerPackerGlobal, self).__init__(*args, **kwargs)
+
+    def _find_best_fit(self, pbin):
+        fit = ((pbin.fitness(r[0], r[1]), k) for k, r in self._sorted_rect.items())
+        fit = (f for f in fit if f[0] is not None)
+        try:
+            _, rect = min(fit, key=self.first_item)
+            return rect
+        except ValueError:
+            return None
+
+
+class TestGlobalPacking(TestCase):
+    """Compare Global mode packing time against the eager implementation,
+    set log to True to print the results"""
+
+    def setUp(self):
+        self.rectangles = random_rectangles(100, 5, 40)
+        self.algos = [MaxRectsBssf, MaxRectsBl, SkylineBl, SkylineMwf, 
+                GuillotineBssfSas]
+        self.log = False
+
+    def run_packer(self, packer_class, algo):
+        p = packer_class(pack_algo=algo)
+        p.add_bin(100, 100, count=float('inf'))
+        for r in self.rectangles:
+            p.add_rect(*r)
+
+        start = timer()
+        p.pack()
+        return timer()-start, p.rect_list()
+
+    def test_global(self):
+        for algo in self.algos:
+            told, rold = self.run_packer(EagerPackerGlobal, algo)
+            tnew, rnew = self.run_packer(PackerGlobal, algo)
+            self.assertEqual(rold, rnew)
+            if self.log:
+                print("{0:<20s} {1:>10.4f}s eager {2:>10.4f}s".format(
+                    algo.__name__, told, tnew))
@@ -1,6 +1,7 @@
 from unittest import TestCase
 import rectpack.enclose as enclose
 import random
+from concurrent.futures import ThreadPoolExecutor
 
 
 
@@ -112,3 +113,63 @@ class TestEnclose(TestCase):
         en = enclose.Enclose(max_width=50, max_height=50)
         packer = en.generate()
         self.assertEqual(packer, None)
+
+    def test_bound(self):
+        """
+        Test the container is the same found refining all the candidates
+        """
+        def refine_all(en):
+            best = None
+            for width, height in en._container_candidates():
+                packer = en._new_packer(width, height)
+                if len(packer[0]) != len(en._rectangles):
+                    continue
+                new_height = max(r.top for r in packer[0])
+                if best is None or width*new_height < best[0]:
+                    best = (width*new_height, width, new_height, packer)
+            return best
+
+        rnd = random.Random(11)
+        for rotation in (True, False):
+            for _ in range(10):
+                rects = [(rnd.randint(1, 20), rnd.randint(1, 20))
+                        for _ in range(rnd.randint(1, 15))]
+                en = enclose.Enclose(rects, rotation=rotation)
+                _, width, height, expected = refine_all(en)
+
+                packer = en.generate()
+                self.assertEqual((packer.width, packer.height), (width, height))
+                self.assertEqual(packer.rect_list(), expected.rect_list())
+
+    def test_lower_bound(self):
+        en = enclose.Enclose([(10, 30), (20, 5)], rotation=True)
+        self.assertEqual(en._lower_bound(30), 400)
+        self.assertEqual(en._lower_bound(25), 30*25)
+        self.assertEqual(en._lower_bound(100), 100*10)
+
+        en = enclose.Enclose([(10, 30), (20, 5)], rotation=False)
+        self.assertEqual(en._lower_bound(30), 30*30)
+
+    def test_parallel(self):
+        """
+        Test candidates refined in parallel return the same container
+        """
+        rnd = random.Random(3)
+        rects = [(rnd.randint(1, 30), rnd.randint(1, 30)) for _ in range(40)]
+        en = enclose.Enclose(rects)
+        expected = en.generate()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for max_workers in (None, 1, 3):
+                packer = en.generate(max_workers=max_workers, executor=executor)
+                self.assertEqual((packer.width, packer.height),
+                        (expected.width, expected.height))
+                self.assertEqual(packer.rect_list(), expected.rect_list())
+
+        # Process pool
+        packer = en.generate(max_workers=2)
+        self.assertEqual(packer.rect_list(), expected.rect_list())
+
+        # Container not found
+        en = enclose.Enclose(rects, max_width=40, max_height=40)
+        self.assertEqual(en.generate(max_workers=2), None)
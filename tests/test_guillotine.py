@@ -1,6 +1,22 @@
 from unittest import TestCase
 import rectpack.guillotine as guillotine
 from rectpack.geometry import Rectangle
+import random
+
+
+class ListMergeGuillotine(guillotine.GuillotineBssfSas):
+    """Reference Guillotine merging sections by checking all of them in
+    repeated passes, the way _add_section used to be implemented"""
+
+    def _add_section(self, section):
+        section.rid = 0
+        sections = self._sections
+        plen = 0
+        while self._merge and sections and plen != len(sections):
+            plen = len(sections)
+            sections = [s for s in sections if not section.join(s)]
+        sections.append(section)
+        self._sections = sections
 
 
 class TestGuillotine(TestCase):
@@ -57,6 +73,7 @@ class TestGuillotine(TestCase):
         g = guillotine.GuillotineBlsfMaxas(50, 100, rot=True)
         rect = g.add_rect(100, 50)
         self.assertEqual(rect, Rectangle(0, 0, 50, 100))
+        self.assertEqual(list(g.to_columns()['rotated']), [1])
 
         # Test returned coordinates
         g = guillotine.GuillotineBlsfMaxas(100, 100, rot=False)
@@ -214,6 +231,18 @@ class TestGuillotine(TestCase):
         self.assertTrue(Rectangle(50, 0, 50, 50) in g._sections)
         self.assertTrue(Rectangle(0, 0, 50, 50) in g._sections)
 
+    def test_add_section_merge_order(self):
+        # Sections are merged in the same order as checking all of them
+        rnd = random.Random(5)
+        rects = [(rnd.randint(1, 20), rnd.randint(1, 20)) for _ in range(300)]
+
+        g = guillotine.GuillotineBssfSas(200, 200)
+        ref = ListMergeGuillotine(200, 200)
+        for r in rects:
+            self.assertEqual(g.add_rect(*r), ref.add_rect(*r))
+            self.assertEqual(g._sections, ref._sections)
+        g.validate_packing()
+
     def test_getitem(self):
         """Test __getitem__ returns requested element or slice"""
         g = guillotine.GuillotineBafSas(100, 100)
@@ -232,3 +261,27 @@ class TestGuillotine(TestCase):
                 [Rectangle(0, 10, 5, 5), Rectangle(5, 10, 1, 1)])
         self.assertEqual(g[0:2],
                 [Rectangle(0, 0, 10, 10), Rectangle(0, 10, 5, 5)])
+
+    def test_free_regions(self):
+        g = guillotine.GuillotineBssfSas(100, 100)
+        self.assertEqual(g.free_regions(), [(100, 100)])
+        g.add_rect(40, 40)
+        self.assertEqual(sorted(g.free_regions()), [(40, 60), (60, 100)])
+
+    def test_fitness_memo(self):
+        """Test add_rect reuses the section selected by fitness"""
+        g = guillotine.GuillotineBssfSas(100, 100)
+        g.add_rect(40, 40)
+        g.fitness(30, 20)
+        self.assertEqual(len(g._fitness_memo), 1)
+
+        g._select_fittest_section = None
+        self.assertEqual(g.add_rect(30, 20), Rectangle(0, 40, 30, 20))
+        self.assertEqual(g._fitness_memo, {})
+        del g._select_fittest_section
+
+        # Sections added by other means also clear the memo
+        g.fitness(10, 10)
+        g._add_section(Rectangle(0, 90, 10, 10))
+        self.assertEqual(g._fitness_memo, {})
+        g.validate_packing()
@@ -0,0 +1,169 @@
+from unittest import TestCase
+from rectpack.geometry import Rectangle
+from rectpack.index import RectIndex, SectionIndex
+import random
+
+
+class TestRectIndex(TestCase):
+
+    def test_init(self):
+        r1 = Rectangle(0, 0, 10, 10)
+        r2 = Rectangle(50, 50, 20, 20)
+        idx = RectIndex(100, 100, [r1, r2])
+        self.assertEqual(len(idx), 2)
+        self.assertEqual(list(idx), [r1, r2])
+        self.assertFalse(RectIndex(100, 100))
+
+    def test_remove(self):
+        r1 = Rectangle(0, 0, 10, 10)
+        r2 = Rectangle(50, 50, 10, 10)
+        r3 = Rectangle(0, 0, 10, 10)
+        idx = RectIndex(100, 100, [r1, r2, r3])
+
+        # Removed by identity, not by value
+        idx.remove(r3)
+        self.assertEqual(len(idx), 2)
+        self.assertTrue(list(idx)[0] is r1)
+        self.assertEqual(idx.fitting(10, 10), [r1, r2])
+
+    def test_replace(self):
+        r1 = Rectangle(0, 0, 50, 100)
+        r2 = Rectangle(50, 0, 50, 100)
+        r3 = Rectangle(0, 0, 100, 10)
+        idx = RectIndex(100, 100, [r1, r2, r3])
+
+        s1 = Rectangle(50, 0, 50, 40)
+        s2 = Rectangle(50, 60, 50, 40)
+        idx.replace(r2, [s1, s2])
+        self.assertEqual(list(idx), [r1, s1, s2, r3])
+
+        # Several levels of replacement keep the order
+        s3 = Rectangle(50, 70, 50, 30)
+        idx.replace(s2, [s3])
+        idx.append(r2)
+        self.assertEqual(list(idx), [r1, s1, s3, r3, r2])
+
+        # Order is kept after renumbering
+        for _ in range(2*RectIndex.MAX_KEY_DEPTH):
+            s = Rectangle(s3.x, s3.y, s3.width, s3.height)
+            idx.replace(s3, [s])
+            s3 = s
+        self.assertEqual(list(idx), [r1, s1, s3, r3, r2])
+
+    def test_intersecting(self):
+        r1 = Rectangle(0, 0, 50, 50)
+        r2 = Rectangle(50, 0, 50, 50)
+        r3 = Rectangle(0, 50, 100, 50)
+        r4 = Rectangle(90, 90, 10, 10)
+        idx = RectIndex(100, 100, [r1, r2, r3, r4])
+
+        self.assertEqual(idx.intersecting(Rectangle(40, 40, 20, 20)),
+                [r1, r2, r3])
+        self.assertEqual(idx.intersecting(Rectangle(95, 95, 5, 5)), [r3, r4])
+
+        # Touching edges is not intersecting
+        self.assertEqual(idx.intersecting(Rectangle(0, 0, 50, 50)), [r1])
+
+    def test_fitting(self):
+        r1 = Rectangle(0, 0, 30, 80)
+        r2 = Rectangle(0, 0, 80, 30)
+        r3 = Rectangle(0, 0, 50, 50)
+        idx = RectIndex(100, 100, [r1, r2, r3])
+
+        self.assertEqual(idx.fitting(30, 30), [r1, r2, r3])
+        self.assertEqual(idx.fitting(40, 30), [r2, r3])
+        self.assertEqual(idx.fitting(30, 60), [r1])
+        self.assertEqual(idx.fitting(90, 10), [])
+
+    def test_decimal(self):
+        from decimal import Decimal
+        r1 = Rectangle(Decimal('0.5'), 0, Decimal('10.25'), 10)
+        idx = RectIndex(Decimal('20.5'), 20, [r1])
+        self.assertEqual(idx.intersecting(Rectangle(10, 5, 1, 1)), [r1])
+        self.assertEqual(idx.intersecting(Rectangle(11, 5, 1, 1)), [])
+
+
+
+class TestSectionIndex(TestCase):
+
+    def brute_force(self, sections, width, height, fitness):
+        """Best (fitness, section) evaluating all sections in order"""
+        best = None
+        for s in sections:
+            if width <= s.width and height <= s.height:
+                fit = fitness(s, width, height)
+                if best is None or fit < best[0]:
+                    best = (fit, s)
+        return best
+
+    def test_remove(self):
+        r1 = Rectangle(0, 0, 10, 10)
+        r2 = Rectangle(50, 50, 10, 10)
+        r3 = Rectangle(0, 0, 10, 10)
+        idx = SectionIndex([r1, r2, r3])
+
+        # Removed by identity, not by value
+        idx.remove(r3)
+        self.assertEqual(len(idx), 2)
+        self.assertTrue(list(idx)[0] is r1)
+        idx.remove(r1)
+        idx.append(r3)
+        self.assertTrue(list(idx)[1] is r3)
+        self.assertTrue(idx.best_area_fit(10, 10)[1] is r2)
+
+    def test_may_fit(self):
+        idx = SectionIndex()
+        self.assertFalse(idx.may_fit(1, 1))
+        idx.append(Rectangle(0, 0, 100, 10))
+        idx.append(Rectangle(0, 10, 10, 100))
+        self.assertTrue(idx.may_fit(10, 10))
+        self.assertFalse(idx.may_fit(101, 1))
+        self.assertFalse(idx.may_fit(1, 101))
+        self.assertFalse(idx.may_fit(50, 50))
+        self.assertEqual(idx.best_area_fit(50, 50), None)
+
+    def test_adjacent(self):
+        s = Rectangle(50, 50, 10, 10)
+        above = Rectangle(50, 60, 10, 40)
+        below = Rectangle(50, 0, 10, 50)
+        left = Rectangle(0, 50, 50, 10)
+        right = Rectangle(60, 50, 40, 10)
+        other = Rectangle(60, 60, 40, 40)  # Shares only a corner
+        narrow = Rectangle(60, 40, 40, 10) # Partial edge
+        idx = SectionIndex([right, other, below, narrow, left, above])
+
+        adjacent = idx.adjacent(s)
+        self.assertEqual([r for _, r in adjacent], [right, below, left, above])
+        self.assertEqual([k for k, _ in adjacent], sorted(k for k, _ in adjacent))
+
+        idx.remove(below)
+        idx.append(below)
+        self.assertEqual([r for _, r in idx.adjacent(s)], 
+                [right, left, above, below])
+
+    def test_best_fit(self):
+        # Same selection as evaluating all sections, ties included
+        fitness = {
+            'best_area_fit': lambda s, w, h: s.width*s.height-w*h,
+            'best_short_side_fit': lambda s, w, h: min(s.width-w, s.height-h),
+            'best_long_side_fit': lambda s, w, h: max(s.width-w, s.height-h)}
+
+        rnd = random.Random(7)
+        sections = [Rectangle(0, 0, rnd.randint(1, 20), rnd.randint(1, 20)) 
+                for _ in range(100)]
+        idx = SectionIndex(sections)
+        for s in sections[::3]:
+            idx.remove(s)
+        sections = list(idx)
+        self.assertEqual(len(sections), 66)
+
+        for _ in range(200):
+            w, h = rnd.randint(1, 22), rnd.randint(1, 22)
+            for method, fit in fitness.items():
+                best = getattr(idx, method)(w, h)
+                expected = self.brute_force(sections, w, h, fit)
+                if expected is None:
+                    self.assertEqual(best, None)
+                else:
+                    self.assertEqual(best[0], expected[0])
+                    self.assertTrue(best[1] is expected[1])
@@ -1,6 +1,8 @@
-from unittest import TestCase
+from unittest import TestCase, skipIf
 from rectpack.geometry import Rectangle, Point
 import rectpack.maxrects as maxrects
+import random
+import array
 
 
 class TestMaxRects(TestCase):
@@ -12,6 +14,11 @@ class TestMaxRects(TestCase):
         self.assertEqual(m.width, 20)
         self.assertEqual(m.height, 50)
 
+        # Positional bid
+        m = maxrects.MaxRectsBssf(100, 100, True, 'mybin')
+        self.assertEqual(m.bid, 'mybin')
+        self.assertFalse(m._vectorize)
+
     def test_reset(self):
         # Test _max_rects and rectangles is initialized
         m = maxrects.MaxRects(100, 200)
@@ -44,6 +51,15 @@ class TestMaxRects(TestCase):
         m = maxrects.MaxRects(200, 50, rot=True)
         self.assertEqual(m.add_rect(40, 80), Rectangle(0, 0, 80, 40))
 
+    def test_to_columns(self):
+        m = maxrects.MaxRectsBl(200, 50)
+        m.add_rect(40, 80, rid=1)
+        m.add_rect(30.5, 30, rid=2)
+        self.assertEqual(m.to_columns(), {'x': array.array('q', [0, 80]),
+            'y': array.array('q', [0, 0]), 'width': [80, 30.5],
+            'height': array.array('q', [40, 30]), 'rid': [1, 2], 
+            'rotated': array.array('b', [1, 0])})
+
     def test_remove_duplicates(self):
         # Test duplicated collisions removed
         m = maxrects.MaxRects(100, 100)
@@ -63,6 +79,21 @@ class TestMaxRects(TestCase):
         m = maxrects.MaxRects(100, 100)
         m._remove_duplicates()
         self.assertEqual(len(m._max_rects), 1)
+
+        # Test only new rectangles are checked
+        m = maxrects.MaxRects(100, 100)
+        m._max_rects = [rect1, rect2, rect3, rect4]
+        m._remove_duplicates([rect1, rect4])
+        self.assertEqual(len(m._max_rects), 4)
+        m._remove_duplicates([rect3, rect4])
+        self.assertEqual(m._max_rects, [rect1, rect2, rect4])
+
+        # Test rectangles with the same dimensions are removed together
+        m = maxrects.MaxRects(100, 100)
+        rect5 = Rectangle(0, 0, 60, 40)
+        m._max_rects = [rect1, rect4, rect5]
+        m._remove_duplicates()
+        self.assertEqual(m._max_rects, [rect4])
         
     def test_iter(self):
         m = maxrects.MaxRects(100, 100)
@@ -239,6 +270,38 @@ class TestMaxRects(TestCase):
         self.assertEqual(m[1:],
                 [Rectangle(40, 0, 20, 20), Rectangle(40, 20, 60, 40)])
 
+    def test_free_regions(self):
+        m = maxrects.MaxRectsBl(100, 100, rot=False)
+        self.assertEqual(m.free_regions(), [(100, 100)])
+        m.add_rect(40, 40)
+        self.assertEqual(sorted(m.free_regions()), [(60, 100), (100, 60)])
+        m.add_rect(60, 100)
+        self.assertEqual(m.free_regions(), [(40, 60)])
+        m.add_rect(40, 60)
+        self.assertEqual(m.free_regions(), [])
+
+    def test_fitness_memo(self):
+        """Test add_rect reuses the placement selected by fitness"""
+        m = maxrects.MaxRectsBssf(100, 100)
+        m.add_rect(40, 40)
+        self.assertEqual(m.fitness(30, 20), m.fitness(30, 20))
+        self.assertEqual(len(m._fitness_memo), 1)
+
+        m._select_position = None
+        self.assertEqual(m.add_rect(30, 20), Rectangle(40, 0, 30, 20))
+        self.assertEqual(m._fitness_memo, {})
+        del m._select_position
+
+        # The memo is cleared and the version bumped when the free space 
+        # changes
+        m.fitness(30, 20)
+        version = m._version
+        m.add_rect(10, 10)
+        self.assertEqual(m._fitness_memo, {})
+        self.assertEqual(m._version, version+1)
+        self.assertEqual(m.add_rect(30, 20), Rectangle(70, 10, 30, 20))
+        m.validate_packing()
+
 
 
 class TestMaxRectBL(TestCase):
@@ -281,3 +344,73 @@ class TestMaxRectBSSF(TestCase):
         self.assertTrue(m.fitness(30, 91) > m.fitness(30, 92))
         self.assertTrue(m.fitness(38, 91) < m.fitness(30, 92))
         self.assertTrue(m.fitness(38, 91) > m.fitness(40, 92))
+
+
+@skipIf(maxrects.numpy is None, "numpy not installed")
+class TestMaxRectsVectorize(TestCase):
+
+    def setUp(self):
+        rnd = random.Random(33)
+        self.rectangles = [(rnd.randint(1, 10), rnd.randint(1, 10)) 
+                for _ in range(100)]
+        self.algos = [maxrects.MaxRects, maxrects.MaxRectsBl, 
+                maxrects.MaxRectsBssf, maxrects.MaxRectsBaf,
+                maxrects.MaxRectsBlsf]
+
+    def test_same_packing(self):
+        # Vectorized fitness must select the same max_rect
+        for algo in self.algos:
+            for rot in (True, False):
+                m1 = algo(60, 50, rot=rot)
+                m2 = algo(60, 50, rot=rot, vectorize=True)
+                for r in self.rectangles:
+                    self.assertEqual(m1.fitness(*r), m2.fitness(*r))
+                    self.assertEqual(m1.add_rect(*r), m2.add_rect(*r))
+                self.assertEqual(m1._max_rects, m2._max_rects)
+                self.assertTrue(m2._free.vectorized)
+
+    def test_float(self):
+        m1 = maxrects.MaxRectsBaf(60.5, 50, rot=True)
+        m2 = maxrects.MaxRectsBaf(60.5, 50, rot=True, vectorize=True)
+        for w, h in self.rectangles:
+            self.assertEqual(m1.add_rect(w*1.5, h), m2.add_rect(w*1.5, h))
+        self.assertTrue(m2._free.vectorized)
+
+    def test_decimal_fallback(self):
+        from decimal import Decimal
+        m = maxrects.MaxRectsBssf(Decimal('100.5'), 100, rot=False, vectorize=True)
+        self.assertFalse(m._free.vectorized)
+        self.assertEqual(m.add_rect(Decimal('10.5'), 10), 
+                Rectangle(0, 0, Decimal('10.5'), 10))
+
+        # Decimal rectangle inside int bin
+        m = maxrects.MaxRectsBssf(100, 100, rot=False, vectorize=True)
+        self.assertEqual(m.add_rect(10, 10), Rectangle(0, 0, 10, 10))
+        self.assertEqual(m.add_rect(Decimal('10.5'), 10), 
+                Rectangle(10, 0, Decimal('10.5'), 10))
+        self.assertFalse(m._free.vectorized)
+        self.assertEqual(m.add_rect(10, 10), Rectangle(Decimal('20.5'), 0, 10, 10))
+
+    def test_large_int_fallback(self):
+        # Values that could overflow int64 fitness use the python path
+        rnd = random.Random(33)
+        rectangles = [(rnd.randint(1, 2**31), rnd.randint(1, 2**31))
+                for _ in range(100)]
+        for algo in self.algos:
+            m1 = algo(2**33, 2**33)
+            m2 = algo(2**33, 2**33, vectorize=True)
+            for r in rectangles:
+                self.assertEqual(m1.fitness(*r), m2.fitness(*r))
+                self.assertEqual(m1.add_rect(*r), m2.add_rect(*r))
+            self.assertEqual(m1._max_rects, m2._max_rects)
+            self.assertFalse(m2._free.vectorized)
+
+        m = maxrects.MaxRectsBaf(2**40, 2**40, vectorize=True)
+        self.assertEqual(m.add_rect(2**39, 2**39), Rectangle(0, 0, 2**39, 2**39))
+        self.assertFalse(m._free.vectorized)
+
+        # Large rectangle queried in a small bin
+        m = maxrects.MaxRectsBaf(100, 100, vectorize=True)
+        self.assertEqual(m.fitness(2**40, 10), None)
+        self.assertEqual(m.add_rect(10, 10), Rectangle(0, 0, 10, 10))
+        self.assertTrue(m._free.vectorized)
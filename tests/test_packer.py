@@ -1,4 +1,9 @@
-from unittest import TestCase
+from unittest import TestCase, skipIf
+import random
+import itertools
+import decimal
+import array
+from concurrent.futures import ThreadPoolExecutor
 from rectpack.geometry import Rectangle
 import rectpack.skyline as skyline
 import rectpack.guillotine as guillotine
@@ -71,6 +76,21 @@ class TestRectangleSort(TestCase):
         # Test empty list
         self.assertEqual(packer.SORT_RATIO([]), [])
 
+    def test_sort_large(self):
+        """Test large lists sorted with numpy keep the same stable order"""
+        rnd = random.Random(1)
+        keys = [(packer.SORT_SSIDE, lambda r: (min(r[0], r[1]), max(r[0], r[1]))),
+                (packer.SORT_LSIDE, lambda r: (max(r[0], r[1]), min(r[0], r[1])))]
+        values = [lambda: rnd.randint(1, 10), lambda: rnd.randint(1, 40)/4.0,
+                lambda: rnd.choice([3, 2.5, 7]), 
+                lambda: decimal.Decimal(rnd.randint(1, 10))/2]
+        for (sort_algo, key), value in itertools.product(keys, values):
+            a = [(value(), value(), i) for i in range(200)]
+            ordered = sort_algo(a)
+            self.assertEqual(ordered, sorted(a, reverse=True, key=key))
+            self.assertEqual([type(r[0]) for r in ordered], 
+                    [type(r[0]) for r in sorted(a, reverse=True, key=key)])
+
 
 
 class TestPackerOnline(TestCase):
@@ -103,6 +123,19 @@ class TestPackerOnline(TestCase):
         bins = list(iter(p))
         self.assertEqual(len(bins), 3)
 
+    def test_add_rects(self):
+        p = packer.PackerOnlineBFF(rotation=False)
+        p.add_bins([50, 30], [50, 30], counts=[1, 2], bids=['a', 'b'])
+        p.add_rects([50, 30, 20], [50, 30, 10], rids=[1, 2, 3])
+        self.assertEqual(p.rect_list(), [(0, 0, 0, 50, 50, 1), 
+            (1, 0, 0, 30, 30, 2), (2, 0, 0, 20, 10, 3)])
+        self.assertEqual([b.bid for b in p], ['a', 'b', 'b'])
+
+        with self.assertRaises(AttributeError):
+            p.add_rects([1, 2], [1])
+        with self.assertRaises(AttributeError):
+            p.add_bins([10], [10], counts=[1, 2])
+
     def test_getitem(self):
         # check exception raised when bin doesn't exist
         p = packer.PackerOnlineBNF(rotation=False)
@@ -335,6 +368,17 @@ class TestPackerOnlineBNF(TestCase):
         self.assertEqual(p.rect_list()[0], (0, 0, 0, 30, 10, None))
         self.assertEqual(len(p), 1)
 
+    def test_sink(self):
+        # Bins closed by BNF are passed to the sink
+        closed = []
+        p = packer.PackerOnlineBNF(sink=closed.append)
+        p.add_bin(50, 50, count=float('inf'))
+        for i in range(5):
+            p.add_rect(40, 40, rid=i)
+        self.assertEqual([b[0].rid for b in closed], [0, 1, 2, 3])
+        # Bin indexes don't restart when bins are released
+        self.assertEqual(p.rect_list(), [(4, 0, 0, 40, 40, 4)])
+        self.assertEqual(p.closed_count, 4)
 
 
 class TestPackerOnlineBFF(TestCase):
@@ -416,9 +460,90 @@ class TestPackerOnlineBFF(TestCase):
             p.add_rect(39, 39)
         self.assertEqual(len(p), 203)
 
+    def test_saturation(self):
+        # Bins where a 10x10 rectangle can't be placed are closed
+        p = packer.PackerOnlineBFF(pack_algo=guillotine.GuillotineBafSas,
+                rotation=False, saturation=(10, 10))
+        p.add_bin(100, 100, count=3)
+
+        p.add_rect(100, 95)
+        self.assertEqual(len(p._closed_bins), 1)
+        self.assertEqual(len(p._open_bins), 0)
+
+        p.add_rect(95, 100)
+        self.assertEqual(len(p._closed_bins), 2)
+
+        # Smaller rectangles aren't packed into closed bins
+        p.add_rect(5, 5)
+        self.assertEqual(len(p._open_bins), 1)
+        self.assertEqual(p.rect_list()[-1], (2, 0, 0, 5, 5, None))
+        p.validate_packing()
+
+    def test_sink(self):
+        # Saturated bins are passed to the sink and released
+        closed = []
+        p = packer.PackerOnlineBFF(pack_algo=guillotine.GuillotineBafSas,
+                rotation=False, saturation=(10, 10), sink=closed.append)
+        p.add_bin(100, 100, count=float('inf'))
+        for _ in range(20):
+            p.add_rect(100, 95)
+        p.add_rect(5, 5)
+        self.assertEqual(len(closed), 20)
+        self.assertEqual(len(p), 1)
+        self.assertEqual(p.closed_count, 20)
+        self.assertEqual(len(p._closed_bins), 0)
+        self.assertEqual(p.rect_list(), [(20, 0, 0, 5, 5, None)])
+        for b in closed:
+            self.assertEqual(b.rect_list(), [(0, 0, 100, 95, None)])
+
+        # Flush closes the remaining bins
+        p.flush()
+        self.assertEqual(len(closed), 21)
+        self.assertEqual(len(p), 0)
+        self.assertEqual(p.closed_count, 21)
+
+        # Bin indexes are stable, and available in the sink
+        released = []
+        p = packer.PackerOnlineBFF(pack_algo=guillotine.GuillotineBafSas,
+                rotation=False, saturation=(10, 10), 
+                sink=lambda b: released.append(p.bin_index(b)))
+        p.add_bin(100, 100, count=float('inf'))
+        p.add_rect(100, 50)
+        p.add_rect(100, 60)
+        self.assertEqual([r[0] for r in p.rect_list()], [0, 1])
+        p.add_rect(100, 45) # Closes the first bin
+        self.assertEqual(released, [0])
+        p.add_rect(20, 20)
+        self.assertEqual(p.rect_list(), [(1, 0, 0, 100, 60, None),
+            (1, 0, 60, 20, 20, None)])
+        self.assertEqual(p.bin_index(p[0]), 1)
+        self.assertEqual(list(p.to_columns()['bin']), [1, 1])
+        if packer.numpy is not None:
+            self.assertEqual(list(p.rect_array()['bin']), [1, 1])
+
+        # Without sink flush keeps the closed bins
+        p = packer.PackerOnlineBFF()
+        p.add_bin(100, 100, count=2)
+        p.add_rect(80, 80)
+        p.add_rect(80, 80)
+        p.flush()
+        self.assertEqual(len(p._closed_bins), 2)
+        self.assertEqual(p.closed_count, 2)
+        self.assertEqual(len(p.rect_list()), 2)
+
 
 class TestPackerOnlineBBF(TestCase):
 
+    def test_sink(self):
+        closed = []
+        p = packer.PackerOnlineBBF(saturation=(10, 10), sink=closed.append)
+        p.add_bin(50, 50, count=float('inf'))
+        for _ in range(10):
+            p.add_rect(50, 45)
+        self.assertEqual(len(closed), 10)
+        self.assertEqual(len(p), 0)
+        self.assertEqual(len(p._open_bounds), 0)
+
     def test_bin_selection(self):
         # Check rectangles are packed into the bin with the best fittness
         # score. In this case the one wasting less area.
@@ -472,6 +597,119 @@ class TestPackerOnlineBBF(TestCase):
             if width==20:
                 self.assertEqual(bin, 100)
 
+    def test_bin_bounds(self):
+        # Open bins where the rectangle can't fit are skipped
+        p = packer.PackerOnlineBBF(pack_algo=maxrects.MaxRectsBssf, 
+                rotation=False)
+        p.add_bin(100, 100, count=3)
+        p.add_rect(100, 90)
+        p.add_rect(50, 50)
+        self.assertEqual(len(p._open_bounds), 2)
+
+        def no_fitness(width, height):
+            raise AssertionError("fitness called")
+        p[0].fitness = no_fitness
+
+        p.add_rect(15, 15)
+        self.assertEqual(p.rect_list()[-1], (1, 50, 0, 15, 15, None))
+        self.assertEqual(len(p._open_bounds), 2)
+
+        # Rectangle too big for any open bin opens a new one
+        p.add_rect(60, 60)
+        self.assertEqual(len(p), 3)
+        self.assertEqual(len(p._open_bounds), 3)
+
+
+class TestPackerBBFSaturation(TestCase):
+
+    def test_saturation(self):
+        # Bins are closed when none of the remaining rectangles fit
+        p = packer.PackerBBF(pack_algo=maxrects.MaxRectsBssf, rotation=False,
+                saturation=True)
+        p.add_bin(100, 100, count=10)
+        for r in [(100, 60), (100, 50), (60, 20), (50, 30)]:
+            p.add_rect(*r)
+        p.pack()
+
+        self.assertEqual(len(p), 2)
+        self.assertEqual(len(p._closed_bins), 1)
+        self.assertEqual(p._closed_bins[0].rect_list(), 
+                [(0, 0, 100, 60, None), (0, 60, 60, 20, None)])
+
+        # The packing is the same without saturation, only bin order changes
+        q = packer.PackerBBF(pack_algo=maxrects.MaxRectsBssf, rotation=False)
+        q.add_bin(100, 100, count=10)
+        for r in [(100, 60), (100, 50), (60, 20), (50, 30)]:
+            q.add_rect(*r)
+        q.pack()
+        self.assertEqual(sorted(b.rect_list() for b in p),
+                sorted(b.rect_list() for b in q))
+
+    def test_newpacker(self):
+        p = packer.newPacker(bin_algo=packer.PackingBin.BFF, saturation=True)
+        self.assertEqual(p._saturation, True)
+        p = packer.newPacker(mode=packer.PackingMode.Online, saturation=(5, 5))
+        self.assertEqual(p._saturation_size, (5, 5, 5, 5))
+
+        with self.assertRaises(AttributeError):
+            packer.newPacker(bin_algo=packer.PackingBin.Global, saturation=True)
+        with self.assertRaises(AttributeError):
+            packer.newPacker(mode=packer.PackingMode.Online, saturation=True)
+
+        # Sink only for online packers
+        p = packer.newPacker(mode=packer.PackingMode.Online, sink=print)
+        self.assertEqual(p._sink, print)
+        with self.assertRaises(AttributeError):
+            packer.newPacker(sink=print)
+
+
+class TestBinBoundIndex(TestCase):
+
+    def test_candidates(self):
+        b1 = maxrects.MaxRectsBssf(100, 100)
+        b2 = maxrects.MaxRectsBssf(100, 100, rot=False)
+        b3 = maxrects.MaxRectsBssf(100, 100)
+        index = packer.BinBoundIndex()
+        for b in (b1, b2, b3):
+            index.add(b)
+        self.assertEqual(len(index), 3)
+
+        b1.add_rect(100, 80)
+        b2.add_rect(100, 80)
+        b3.add_rect(90, 90)
+        for b in (b1, b2, b3):
+            index.update(b)
+
+        self.assertEqual(sorted(index.candidates(10, 10)), 
+                [(0, b1), (1, b2), (2, b3)])
+        self.assertEqual(sorted(index.candidates(20, 20)), [(0, b1), (1, b2)])
+        self.assertEqual(sorted(index.candidates(30, 20)), [(0, b1), (1, b2)])
+        self.assertEqual(sorted(index.candidates(20, 30)), [(0, b1)])
+        self.assertEqual(list(index.candidates(30, 30)), [])
+
+        # Removed bins keep their number
+        self.assertEqual(index.remove(b1), 0)
+        self.assertEqual(list(index.candidates(20, 20)), [(1, b2)])
+        self.assertEqual(len(index), 2)
+
+
+class TestRectSizeIndex(TestCase):
+
+    def test_fitting(self):
+        index = packer.RectSizeIndex([(0, 10, 50), (1, 20, 20), (2, 50, 10), 
+            (3, 30, 30), (4, 5, 5)])
+        self.assertEqual(len(index), 5)
+
+        self.assertEqual(sorted(index.fitting([(100, 100)])), [0, 1, 2, 3, 4])
+        self.assertEqual(sorted(index.fitting([(10, 60)])), [0, 2, 4])
+        self.assertEqual(sorted(index.fitting([(20, 20), (50, 5)])), [1, 4])
+        self.assertEqual(sorted(index.fitting([(4, 100)])), [])
+        self.assertEqual(index.fitting([]), [])
+
+        index.remove(2, 50, 10)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(sorted(index.fitting([(10, 60)])), [0, 4])
+
 
 class TestPacker(TestCase):
 
@@ -694,6 +932,283 @@ class TestPacker(TestCase):
         self.assertTrue((1, 0, 0, 80, 80, None) in p.rect_list())
         self.assertTrue((2, 0, 0, 70, 70, None) in p.rect_list())
 
+    def test_add_rects(self):
+        # Rectangles added in bulk are packed the same as one by one, and
+        # in the same order when mixed with add_rect
+        rnd = random.Random(5)
+        rects = [(rnd.randint(1, 30), rnd.randint(1, 30), i) for i in range(90)]
+        sorts = [packer.SORT_AREA, packer.SORT_PERI, packer.SORT_DIFF, 
+                packer.SORT_SSIDE, packer.SORT_LSIDE, packer.SORT_RATIO, 
+                packer.SORT_NONE]
+        for sort_algo in sorts:
+            single = packer.PackerBBF(sort_algo=sort_algo)
+            bulk = packer.PackerBBF(sort_algo=sort_algo)
+            for p in (single, bulk):
+                p.add_bin(50, 50, count=float('inf'))
+            for r in rects:
+                single.add_rect(*r)
+            bulk.add_rects([r[0] for r in rects[:40]], 
+                    [r[1] for r in rects[:40]], [r[2] for r in rects[:40]])
+            for r in rects[40:50]:
+                bulk.add_rect(*r)
+            bulk.add_rects([r[0] for r in rects[50:]], 
+                    [r[1] for r in rects[50:]], range(50, 90))
+            single.pack()
+            bulk.pack()
+            self.assertEqual(single.rect_list(), bulk.rect_list())
+
+        # Without ids
+        p = packer.PackerBNF(sort_algo=packer.SORT_NONE)
+        p.add_bin(20, 20, count=10)
+        p.add_rect(20, 20, 'a')
+        p.add_rects((10, 20), (10, 20))
+        p.pack()
+        self.assertEqual(p.rect_list(), [(0, 0, 0, 20, 20, 'a'), 
+            (1, 0, 0, 10, 10, None), (2, 0, 0, 20, 20, None)])
+
+        # Decimal rectangles use the regular sort
+        p = packer.PackerBFF(sort_algo=packer.SORT_AREA)
+        p.add_bin(decimal.Decimal('10.5'), decimal.Decimal('10.5'))
+        p.add_rects([decimal.Decimal('2.5'), decimal.Decimal('5.5')], 
+                [decimal.Decimal('2.5'), decimal.Decimal('5.5')], [0, 1])
+        p.pack()
+        self.assertEqual([r[5] for r in p.rect_list()], [1, 0])
+
+        with self.assertRaises(AttributeError):
+            p.add_rects([1, 2], [1, 2], [1])
+
+    @skipIf(packer.numpy is None, "numpy not installed")
+    def test_add_rects_numpy(self):
+        numpy = packer.numpy
+        p = packer.PackerBFF(sort_algo=packer.SORT_AREA)
+        p.add_bins(numpy.array([30]), numpy.array([30]), counts=numpy.array([2]))
+        p.add_rects(numpy.array([10, 30, 20]), numpy.array([10, 30, 20]), 
+                numpy.arange(3))
+        p.add_rects(numpy.array([5.5]), numpy.array([5.5]))
+        p.pack()
+        self.assertEqual(p.rect_list(), [(0, 0, 0, 30, 30, 1), 
+            (1, 0, 0, 20, 20, 2), (1, 20, 0, 10, 10, 0), 
+            (1, 20, 10, 5.5, 5.5, None)])
+        # Values are converted to python numbers
+        self.assertEqual([type(r[3]) for r in p.rect_list()], 
+                [int, int, int, float])
+        self.assertEqual([type(r[5]) for r in p.rect_list()][:3], [int]*3)
+
+    def test_sort_columns(self):
+        # Vectorized sort returns the same order as the sort algos
+        rnd = random.Random(3)
+        sorts = [packer.SORT_AREA, packer.SORT_PERI, packer.SORT_DIFF, 
+                packer.SORT_SSIDE, packer.SORT_LSIDE, packer.SORT_RATIO, 
+                packer.SORT_NONE]
+        values = [lambda: rnd.randint(1, 10), lambda: rnd.randint(1, 20)/4.0,
+                lambda: rnd.choice([3, 2.5, 7])]
+        for sort_algo, value in itertools.product(sorts, values):
+            widths = [value() for _ in range(300)]
+            heights = [value() for _ in range(300)]
+            rids = list(range(300))
+            self.assertEqual(packer._sort_columns(sort_algo, widths, heights, 
+                rids), sort_algo(zip(widths, heights, rids)))
+
+    def test_add_rects_custom_sort(self):
+        # Custom sort algos receive a list, same as with add_rect
+        p = packer.PackerBFF(sort_algo=lambda l: list(reversed(l)))
+        p.add_bin(100, 100)
+        p.add_rects([10, 20], [10, 20], [1, 2])
+        p.pack()
+        self.assertEqual([r[5] for r in p.rect_list()], [2, 1])
+
+    @skipIf(packer.numpy is None, "numpy not installed")
+    def test_sort_columns_dtypes(self):
+        # Keys of narrow, unsigned, and float32 columns don't overflow or 
+        # lose precision.
+        numpy = packer.numpy
+        self.assertEqual(list(packer._argsort_columns(packer.SORT_AREA,
+            numpy.array([200, 10, 100], dtype=numpy.uint8),
+            numpy.array([200, 10, 3], dtype=numpy.uint8))), [0, 2, 1])
+        self.assertEqual(list(packer._argsort_columns(packer.SORT_DIFF,
+            numpy.array([200, 10, 100], dtype=numpy.uint8),
+            numpy.array([200, 10, 3], dtype=numpy.uint8))), [2, 0, 1])
+        self.assertEqual(list(packer._argsort_columns(packer.SORT_AREA,
+            numpy.array([100000, 50000, 1], dtype=numpy.int32),
+            numpy.array([100000, 50000, 1], dtype=numpy.int32))), [0, 1, 2])
+
+        rnd = numpy.random.RandomState(5)
+        sorts = [packer.SORT_AREA, packer.SORT_PERI, packer.SORT_DIFF, 
+                packer.SORT_SSIDE, packer.SORT_LSIDE, packer.SORT_RATIO]
+        columns = [rnd.randint(1, 255, 300).astype(numpy.uint8),
+            rnd.randint(1, 60000, 300).astype(numpy.int32),
+            (rnd.rand(300)*1000).astype(numpy.float32)]
+        for sort_algo, column in itertools.product(sorts, columns):
+            widths, heights = column, column[::-1].copy()
+            rids = list(range(300))
+            self.assertEqual(packer._sort_columns(sort_algo, widths, heights, 
+                rids), sort_algo(zip(widths.tolist(), heights.tolist(), rids)))
+
+    def test_to_columns(self):
+        p = packer.PackerBFF(sort_algo=packer.SORT_NONE)
+        self.assertEqual(p.to_columns()['bin'], array.array('q'))
+        p.add_bin(50, 50, count=2)
+        p.add_bin(50, 50, compact=True)
+        p.add_rect(50, 50, 1)
+        p.add_rect(10, 50, 2)
+        p.add_rect(50, 40, 3)
+        p.add_rect(50, 50, 4)
+        p.pack()
+        self.assertEqual(p.rect_list(), [(0, 0, 0, 50, 50, 1), 
+            (1, 0, 0, 10, 50, 2), (1, 10, 0, 40, 50, 3), (2, 0, 0, 50, 50, 4)])
+
+        columns = p.to_columns()
+        self.assertEqual(columns['bin'], array.array('q', [0, 1, 1, 2]))
+        self.assertEqual(columns['x'], array.array('q', [0, 0, 10, 0]))
+        self.assertEqual(columns['y'], array.array('q', [0, 0, 0, 0]))
+        self.assertEqual(columns['width'], array.array('q', [50, 10, 40, 50]))
+        self.assertEqual(columns['height'], array.array('q', [50, 50, 50, 50]))
+        self.assertEqual(columns['rid'], array.array('q', [1, 2, 3, 4]))
+        self.assertEqual(columns['rotated'], array.array('b', [0, 0, 1, 0]))
+
+        # Values other than int or float are returned in lists
+        p = packer.PackerBFF()
+        p.add_bin(decimal.Decimal('10.5'), 10)
+        p.add_rect(decimal.Decimal('2.5'), 3, 'a')
+        p.pack()
+        columns = p.to_columns()
+        self.assertEqual(columns['width'], [decimal.Decimal('2.5')])
+        self.assertEqual(columns['rid'], ['a'])
+
+    @skipIf(packer.numpy is None, "numpy not installed")
+    def test_rect_array(self):
+        p = packer.PackerBFF(sort_algo=packer.SORT_NONE)
+        p.add_bin(50, 50, count=2)
+        p.add_bin(50, 50, compact=True)
+        for r in [(50, 50, 1), (10, 50, 2), (50, 40, 3), (50, 50, 4)]:
+            p.add_rect(*r)
+        p.pack()
+        result = p.rect_array()
+        self.assertEqual(result.dtype.names, ('bin', 'x', 'y', 'width', 
+            'height', 'rid', 'rotated'))
+        self.assertEqual(result.dtype['x'], packer.numpy.int64)
+        self.assertEqual(result.dtype['rid'], packer.numpy.int64)
+        self.assertEqual([tuple(r)[:6] for r in result.tolist()], 
+                p.rect_list())
+        self.assertEqual(result['rotated'].tolist(), 
+                [False, False, True, False])
+
+        # Float and mixed columns
+        p = packer.PackerBFF(sort_algo=packer.SORT_NONE)
+        p.add_bin(50, 50)
+        p.add_rect(10.5, 10, 'a')
+        p.add_rect(10, 10)
+        p.pack()
+        result = p.rect_array()
+        self.assertEqual(result.dtype['x'], packer.numpy.float64)
+        self.assertEqual(result.dtype['width'], packer.numpy.float64)
+        self.assertEqual(result.dtype['y'], packer.numpy.int64)
+        self.assertEqual(result.dtype['rid'], object)
+        self.assertEqual(result['rid'].tolist(), ['a', None])
+        self.assertEqual(len(packer.PackerBFF().rect_array()), 0)
+
+    def test_partitioners(self):
+        rects = [(1, 1, 'a'), (4, 4, 'b'), (2, 2, 'c'), (3, 3, 'd'), (5, 5, 'e')]
+        self.assertEqual(packer.PARTITION_ROUND_ROBIN(rects, 2),
+                [[(5, 5, 'e'), (3, 3, 'd'), (1, 1, 'a')], 
+                 [(4, 4, 'b'), (2, 2, 'c')]])
+        self.assertEqual(packer.PARTITION_SIZE_CLASS(rects, 2),
+                [[(5, 5, 'e'), (4, 4, 'b'), (3, 3, 'd')], 
+                 [(2, 2, 'c'), (1, 1, 'a')]])
+        self.assertEqual(packer.PARTITION_SIZE_CLASS(rects[:1], 3),
+                [[(1, 1, 'a')], [], []])
+
+    def test_sharded_pack(self):
+        rnd = random.Random(7)
+        rects = [(rnd.randint(5, 40), rnd.randint(5, 40), i) for i in range(200)]
+        partitioners = [packer.PARTITION_ROUND_ROBIN, packer.PARTITION_SIZE_CLASS]
+        packers = [packer.PackerBNF, packer.PackerBFF, packer.PackerBBF,
+                packer.PackerGlobal]
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            for packer_class, partitioner in itertools.product(packers, partitioners):
+                p = packer_class()
+                p.add_bin(100, 100, count=5, bid='small')
+                p.add_bin(200, 200, count=float('inf'), bid='big')
+                for r in rects:
+                    p.add_rect(*r)
+                p.pack(shards=3, partitioner=partitioner, executor=executor)
+
+                # All rectangles packed once with their rid
+                self.assertEqual(sorted(r[5] for r in p.rect_list()), 
+                        list(range(200)))
+                self.assertEqual(len(p.bin_list()), len(p))
+                self.assertTrue([b.bid for b in p].count('small') <= 5)
+                for b in p:
+                    self.assertEqual((b.width, b.height), 
+                            (100, 100) if b.bid == 'small' else (200, 200))
+                    for r1, r2 in itertools.combinations(b, 2):
+                        self.assertFalse(r1.intersects(r2))
+                    for r, rotated in zip(b, b.to_columns()['rotated']):
+                        self.assertTrue(r.right <= b.width and r.top <= b.height)
+                        self.assertEqual(bool(rotated), 
+                                r.width != rects[r.rid][0])
+
+    def test_sharded_pack_leftovers(self):
+        # Rectangles that don't fit in their shard are packed into 
+        # the remaining bins
+        p = packer.PackerBFF(sort_algo=packer.SORT_AREA)
+        p.add_bin(50, 50, count=2)
+        p.add_bin(100, 100, count=1, bid='last')
+        for _ in range(2):
+            p.add_rect(50, 50)
+        p.add_rect(100, 100)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            p.pack(shards=2, executor=executor)
+        self.assertEqual(len(p.rect_list()), 3)
+        self.assertEqual(p.bin_list(), [(100, 100), (50, 50), (50, 50)])
+
+        # Bins are shared out between shards
+        p = packer.PackerBFF()
+        p.add_bin(50, 50, count=1)
+        for _ in range(4):
+            p.add_rect(50, 50)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            p.pack(shards=4, executor=executor)
+        self.assertEqual(len(p.rect_list()), 1)
+        self.assertEqual(len(p), 1)
+
+    def test_sharded_pack_bin_options(self):
+        # Shards pack with the same bin options
+        merges = []
+
+        class RecordingGuillotine(guillotine.GuillotineBssfSas):
+            def __init__(self, *args, **kwargs):
+                super(RecordingGuillotine, self).__init__(*args, **kwargs)
+                merges.append(self._merge)
+
+        p = packer.PackerBFF(pack_algo=RecordingGuillotine)
+        p.add_bin(100, 100, count=4, merge=False, bid='b')
+        for _ in range(20):
+            p.add_rect(30, 30)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            p.pack(shards=2, executor=executor)
+        self.assertEqual(len(p.rect_list()), 20)
+        self.assertTrue(merges)
+        self.assertEqual(set(merges), {False})
+        self.assertEqual(set(b.bid for b in p), {'b'})
+
+    def test_sharded_pack_process_pool(self):
+        rects = [(10, 10), (20, 20), (30, 30), (10, 20), (20, 30)]*4
+        single = packer.PackerBBF()
+        sharded = packer.PackerBBF()
+        for p in (single, sharded):
+            p.add_bin(100, 100, count=float('inf'))
+            for r in rects:
+                p.add_rect(*r)
+        single.pack()
+        sharded.pack(shards=2, max_workers=2)
+        self.assertEqual(len(sharded.rect_list()), len(rects))
+        self.assertEqual(single.bin_list(), [(100, 100)])
+        # Each shard uses its own bins
+        self.assertEqual(sharded.bin_list(), [(100, 100), (100, 100)])
+
+
 
 class TestPackerBNF(TestCase):
     
@@ -885,6 +1400,28 @@ class TestPackerGlobal(TestCase):
         self.assertEqual(len(p.rect_list()), 0)
         self.assertEqual(len(p.bin_list()), 0)
 
+    def test_lazy(self):
+        # Lazy evaluation returns the same packing as evaluating all the
+        # rectangles after each placement.
+        rnd = random.Random(11)
+        rects = [(rnd.randint(5, 30), rnd.randint(5, 30)) for _ in range(40)]
+        rects += [(rnd.randint(50, 300)/10.0, rnd.randint(50, 300)/10.0) 
+                for _ in range(40)]
+        algos = [maxrects.MaxRectsBl, skyline.SkylineBl, maxrects.MaxRectsBssf]
+
+        for algo in algos:
+            for rot in (True, False):
+                packings = []
+                for lazy in (True, False):
+                    p = packer.PackerGlobal(pack_algo=algo, rotation=rot, 
+                            lazy=lazy)
+                    p.add_bin(80, 80, count=float('inf'))
+                    for r in rects:
+                        p.add_rect(*r)
+                    p.pack()
+                    packings.append(p.rect_list())
+                self.assertEqual(packings[0], packings[1])
+
     def test_bin_selection(self):
         # Test rectangles with better fitness are placed first 
         p = packer.PackerGlobal(pack_algo=skyline.SkylineMwfl, 
@@ -1218,3 +1755,23 @@ class TestNewPacker(TestCase):
 
 
 
+
+    def test_bin_compact(self):
+        """Test bins storing rectangles in compact mode give the same result"""
+        rects = [(199, 199, 'a'), (100, 40, 'b'), (40, 40, 'c'), 
+                (20, 20, 'd'), (180, 179, 'e')]
+        results = []
+
+        for compact in (False, True):
+            p = packer.newPacker(mode=packer.PackingMode.Offline,
+                    bin_algo=packer.PackingBin.BFF)
+            p.add_bin(200, 200, count=10, compact=compact)
+            for r in rects:
+                p.add_rect(*r)
+            p.pack()
+
+            for abin in p:
+                self.assertEqual(abin.compact, compact)
+            results.append(p.rect_list())
+
+        self.assertEqual(results[0], results[1])
@@ -0,0 +1,95 @@
+from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
+import random
+
+import rectpack.portfolio as portfolio
+import rectpack.packer as packer
+import rectpack.maxrects as maxrects
+import rectpack.skyline as skyline
+import rectpack.guillotine as guillotine
+
+
+class TestPackBest(TestCase):
+
+    def setUp(self):
+        rnd = random.Random(5)
+        self.rectangles = [(rnd.randint(5, 50), rnd.randint(5, 50), i) 
+                for i in range(60)]
+        self.bins = [(100, 100, 20)]
+
+    def _bins_used(self, candidate):
+        p = packer.newPacker(**candidate)
+        for b in self.bins:
+            p.add_bin(*b)
+        for r in self.rectangles:
+            p.add_rect(*r)
+        p.pack()
+        return len(p)
+
+    def test_candidate_product(self):
+        candidates = portfolio.candidate_product(
+                [maxrects.MaxRectsBssf, skyline.SkylineBl],
+                [packer.SORT_AREA, packer.SORT_PERI],
+                [packer.PackingBin.BBF, packer.PackingBin.Global])
+        
+        # Only one candidate for each pack algo with Global
+        self.assertEqual(len(candidates), 6)
+        self.assertEqual(candidates[0], {'pack_algo': maxrects.MaxRectsBssf,
+            'sort_algo': packer.SORT_AREA, 'bin_algo': packer.PackingBin.BBF,
+            'rotation': True})
+        self.assertEqual(candidates[2]['bin_algo'], packer.PackingBin.Global)
+
+    def test_pack_best(self):
+        candidates = portfolio.candidate_product(
+                [maxrects.MaxRectsBssf, guillotine.GuillotineBssfSas],
+                [packer.SORT_AREA, packer.SORT_NONE],
+                [packer.PackingBin.BNF, packer.PackingBin.BBF])
+        
+        result = portfolio.pack_best(self.rectangles, self.bins, 
+                candidates=candidates, max_workers=2)
+        self.assertEqual(len(result.results), len(candidates))
+
+        for candidate, res in zip(candidates, result.results):
+            self.assertTrue(res.candidate is candidate)
+            self.assertEqual(res.rects, len(self.rectangles))
+            self.assertEqual(res.bins, self._bins_used(candidate))
+            self.assertEqual(res.area, res.bins*100*100)
+            self.assertTrue(res.time >= 0)
+
+        # First candidate with the fewest bins
+        bins = [r.bins for r in result.results]
+        best = bins.index(min(bins))
+        self.assertTrue(result.candidate is candidates[best])
+        self.assertEqual(len(result.packer), min(bins))
+        self.assertEqual(len(result.packer.rect_list()), len(self.rectangles))
+        result.packer.validate_packing()
+
+    def test_tie_break(self):
+        # Candidates packing more rectangles win even if they use more bins,
+        # then the first one of those with the same result.
+        bins = [(100, 100, 1), (20, 20, 1), (30, 30, 1)]
+        rects = [(15, 15), (90, 90)]
+        candidates = [
+            {'pack_algo': maxrects.MaxRectsBssf, 'bin_algo': packer.PackingBin.BNF,
+                'sort_algo': packer.SORT_NONE},
+            {'pack_algo': maxrects.MaxRectsBssf, 'bin_algo': packer.PackingBin.BBF},
+            {'pack_algo': maxrects.MaxRectsBl, 'bin_algo': packer.PackingBin.BBF}]
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            result = portfolio.pack_best(rects, bins, candidates, 
+                    executor=executor)
+        self.assertEqual([r.bins for r in result.results], [1, 2, 2])
+        self.assertEqual([r.rects for r in result.results], [1, 2, 2])
+        self.assertEqual([r.area for r in result.results], [10000, 10400, 10400])
+        self.assertTrue(result.candidate is candidates[1])
+        self.assertEqual(len(result.packer.rect_list()), 2)
+
+        with self.assertRaises(AttributeError):
+            portfolio.pack_best(rects, bins, [])
+
+    def test_default_candidates(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            result = portfolio.pack_best(self.rectangles[:20], self.bins, 
+                    executor=executor)
+        self.assertEqual(len(result.results), len(portfolio.DEFAULT_CANDIDATES))
+        self.assertEqual(len(result.packer.rect_list()), 20)
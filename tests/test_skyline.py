@@ -1,6 +1,7 @@
 from unittest import TestCase
 from rectpack.geometry import Rectangle
 import rectpack.skyline as skyline
+import random
 
 
 class TestSkyline(TestCase):
@@ -11,12 +12,20 @@ class TestSkyline(TestCase):
         rect2 = s.add_rect(100, 70)
         self.assertEqual(rect1, Rectangle(0, 0, 30, 30))
         self.assertEqual(rect2, Rectangle(0, 30, 100, 70))
+
+        # Positional bid
+        s = skyline.SkylineBlWm(100, 100, True, 'mybin')
+        self.assertEqual(s.bid, 'mybin')
+        self.assertEqual(s._waste._min_size, None)
+        s = skyline.SkylineBlWm(100, 100, min_waste=(5, 5))
+        self.assertEqual(s._waste._min_size, (5, 5))
   
     def test_rotation(self):
         # Test rotation is enabled by default
         s = skyline.SkylineBl(100, 10)
         rect1 = s.add_rect(10, 100)
         self.assertEqual(rect1, Rectangle(0, 0, 100, 10))
+        self.assertEqual(list(s.to_columns()['rotated']), [1])
 
         # Test rotation can be disabled
         s = skyline.SkylineBl(100, 10, rot=False)
@@ -509,6 +518,86 @@ class TestSkyline(TestCase):
                 [Rectangle(20, 60, 80, 20), Rectangle(60, 30, 40, 30)])
 
 
+class TestSkylinePlacementCache(TestCase):
+
+    def test_cached_placement(self):
+        # Cached placements must be the same as evaluating all of them
+        rnd = random.Random(33)
+        sizes = [(rnd.randint(1, 12), rnd.randint(1, 12)) for _ in range(8)]
+        algos = [skyline.SkylineBl, skyline.SkylineMwf, skyline.SkylineMwfl,
+                skyline.SkylineMwflWm]
+
+        for algo in algos:
+            for rot in (True, False):
+                s1 = algo(60, 40, rot=rot)
+                s2 = algo(60, 40, rot=rot)
+                s2._cacheable = False
+                for _ in range(40):
+                    for size in sizes:
+                        self.assertEqual(s1.fitness(*size), s2.fitness(*size))
+                    size = rnd.choice(sizes)
+                    self.assertEqual(s1.add_rect(*size), s2.add_rect(*size))
+
+    def test_cache_invalidation(self):
+        s = skyline.SkylineBl(100, 100, rot=False)
+        self.assertEqual(s.fitness(30, 30), 30)
+        self.assertEqual(len(s._placement_cache), 1)
+
+        # Cached placement is modified
+        self.assertEqual(s.add_rect(30, 30), Rectangle(0, 0, 30, 30))
+        self.assertEqual(s.fitness(30, 30), 30)
+        self.assertEqual(s.add_rect(30, 30), Rectangle(30, 0, 30, 30))
+
+        # Returned rectangles are not shared
+        r1 = s.add_rect(10, 10, rid=1)
+        self.assertEqual(s.fitness(10, 10), 10)
+        r2 = s.add_rect(10, 10, rid=2)
+        self.assertFalse(r1 is r2)
+        self.assertEqual(r1.rid, 1)
+
+        # Floats are never cached
+        s.reset()
+        self.assertEqual(s.fitness(30.5, 30), 30)
+        self.assertEqual(len(s._placement_cache), 0)
+
+    def test_free_regions(self):
+        s = skyline.SkylineBl(100, 100, rot=False)
+        self.assertEqual(s.free_regions(), [(100, 100)])
+        s.add_rect(40, 40)
+        s.add_rect(20, 100)
+        self.assertEqual(s.free_regions(), [(40, 60), (40, 100)])
+
+        # Wasted sections are free regions too
+        s = skyline.SkylineBlWm(100, 100, rot=False)
+        s.add_rect(60, 20)
+        s.add_rect(40, 10)
+        s.add_rect(100, 10)
+        self.assertEqual(s.free_regions(), [(100, 70), (40, 10)])
+
+        # With float coordinates the whole surface is returned
+        s = skyline.SkylineBl(100, 100, rot=False)
+        s.add_rect(40.5, 40)
+        self.assertEqual(s.free_regions(), [(100, 100)])
+
+    def test_fitness_memo(self):
+        s = skyline.SkylineBlWm(100, 100, rot=False)
+        s.add_rect(60, 20)
+        s.add_rect(40, 10)
+        s.add_rect(100, 10)
+        self.assertEqual(s.fitness(10, 10), 0)
+        self.assertEqual(s.fitness(50, 50), 80)
+        self.assertEqual(len(s._fitness_memo), 1)
+        self.assertEqual(len(s._waste._fitness_memo), 2)
+
+        # Placement in the wasted space keeps the skyline selections
+        s._select_position = None
+        self.assertEqual(s.add_rect(10, 10), Rectangle(60, 10, 10, 10))
+        self.assertEqual(s._waste._fitness_memo, {})
+        self.assertEqual(len(s._fitness_memo), 1)
+        self.assertEqual(s.add_rect(50, 50), Rectangle(0, 30, 50, 50))
+        self.assertEqual(s._fitness_memo, {})
+
+
 class TestSkylineMwf(TestCase):
 
     def test_init(self):
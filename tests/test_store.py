@@ -0,0 +1,99 @@
+from unittest import TestCase
+from decimal import Decimal
+from rectpack.geometry import Rectangle
+from rectpack.store import RectangleStore, concat_columns, typed_column
+import array
+import rectpack.maxrects as maxrects
+
+
+class TestRectangleStore(TestCase):
+
+    def test_append(self):
+        s = RectangleStore()
+        self.assertEqual(len(s), 0)
+        self.assertEqual(s.rect_list(), [])
+
+        s.append(Rectangle(1, 2, 3, 4, 'a'))
+        s.append(Rectangle(5, 6, 7, 8))
+        self.assertEqual(len(s), 2)
+        self.assertEqual(s.x.typecode, 'q')
+        self.assertEqual(s.rect_list(), [(1, 2, 3, 4, 'a'), (5, 6, 7, 8, None)])
+
+    def test_getitem(self):
+        s = RectangleStore([Rectangle(1, 2, 3, 4, 'a'), Rectangle(5, 6, 7, 8)])
+        self.assertEqual(s[0], Rectangle(1, 2, 3, 4))
+        self.assertEqual(s[0].rid, 'a')
+        self.assertEqual(s[-1], Rectangle(5, 6, 7, 8))
+        self.assertEqual(s[1:], [Rectangle(5, 6, 7, 8)])
+        self.assertEqual(list(s), [Rectangle(1, 2, 3, 4), Rectangle(5, 6, 7, 8)])
+
+        with self.assertRaises(IndexError):
+            s[2]
+
+    def test_mixed_types(self):
+        # Values are returned with the same type they were stored
+        s = RectangleStore()
+        s.append(Rectangle(1, 2, 3, 4))
+        s.append(Rectangle(1.5, 2, 3, 4))
+        s.append(Rectangle(1, 2, Decimal('3.5'), 4))
+        self.assertEqual(s.y.typecode, 'q')
+        self.assertEqual([type(x) for x in s.x], [int, float, int])
+        self.assertEqual([type(w) for w in s.width], [int, int, Decimal])
+
+        s = RectangleStore([Rectangle(1.5, 2.5, 3.0, 4.0)])
+        self.assertEqual(s.x.typecode, 'd')
+        s.append(Rectangle(1, 2, 3.0, 4.0))
+        self.assertTrue(type(s[1].x) is int)
+
+    def test_columns(self):
+        s = RectangleStore()
+        self.assertEqual(s.columns(), ([], [], [], [], []))
+        s.append(Rectangle(1, 2, 3, 4, 'a'))
+        s.append(Rectangle(5, 6, 7.5, 8))
+        x, y, width, height, rid = s.columns()
+        self.assertTrue(x is s.x)
+        self.assertEqual(x, array.array('q', [1, 5]))
+        self.assertEqual(width, [3, 7.5])
+        self.assertEqual(rid, ['a', None])
+
+    def test_typed_column(self):
+        self.assertEqual(typed_column([1, 2]), array.array('q', [1, 2]))
+        self.assertEqual(typed_column([1.5, 2.0]), array.array('d', [1.5, 2.0]))
+        self.assertEqual(typed_column([1, 2.5]), [1, 2.5])
+        self.assertEqual(typed_column([1.5, 2]), [1.5, 2])
+        self.assertEqual(typed_column([1, None]), [1, None])
+        self.assertEqual(typed_column([Decimal('1.5')]), [Decimal('1.5')])
+        self.assertEqual(typed_column([]), [])
+
+    def test_concat_columns(self):
+        result = concat_columns([array.array('q', [1, 2]), array.array('q'), 
+            array.array('q', [3])])
+        self.assertEqual(result, array.array('q', [1, 2, 3]))
+
+        # Different types are concatenated into a list
+        result = concat_columns([array.array('q', [1]), [], 
+            array.array('d', [2.5])])
+        self.assertEqual(result, [1, 2.5])
+        self.assertEqual(concat_columns([[Decimal('1.5')], 
+            array.array('q', [2])]), [Decimal('1.5'), 2])
+        self.assertEqual(concat_columns([]), [])
+
+    def test_packing_algorithm(self):
+        m = maxrects.MaxRectsBl(100, 100, rot=False, compact=True)
+        m.add_rect(40, 40)
+        m.add_rect(20, 20, rid=3)
+        self.assertTrue(isinstance(m.rectangles, RectangleStore))
+        self.assertEqual(len(m), 2)
+        self.assertEqual(m[1], Rectangle(40, 0, 20, 20))
+        self.assertEqual(m.rect_list(), [(0, 0, 40, 40, None), (40, 0, 20, 20, 3)])
+        self.assertEqual(m.used_area(), 2000)
+        m.validate_packing()
+
+        # Store columns are returned without copying
+        columns = m.to_columns()
+        self.assertTrue(columns['x'] is m.rectangles.x)
+        self.assertEqual(columns['rotated'], array.array('b', [0, 0]))
+
+        m.reset()
+        self.assertEqual(len(m), 0)
+        self.assertTrue(isinstance(m.rectangles, RectangleStore))
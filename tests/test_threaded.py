@@ -0,0 +1,144 @@
+from unittest import TestCase
+import random
+import itertools
+import threading
+import time
+import sys
+import rectpack.packer as packer
+import rectpack.threaded as threaded
+import rectpack.guillotine as guillotine
+
+
+def random_rects(seed, count):
+    rnd = random.Random(seed)
+    return [(rnd.randint(5, 60), rnd.randint(5, 60), i) for i in range(count)]
+
+
+class CheckedGuillotine(guillotine.GuillotineBssfSas):
+    """Guillotine recording when it is used by two threads at once"""
+
+    overlaps = []
+
+    def __init__(self, *args, **kwargs):
+        self._guard = threading.Lock()
+        super(CheckedGuillotine, self).__init__(*args, **kwargs)
+
+    def _checked(self, method, *args, **kwargs):
+        if not self._guard.acquire(False):
+            self.overlaps.append(self)
+            return method(*args, **kwargs)
+        try:
+            time.sleep(0) # Give other threads a chance to enter
+            return method(*args, **kwargs)
+        finally:
+            self._guard.release()
+
+    def add_rect(self, *args, **kwargs):
+        return self._checked(super(CheckedGuillotine, self).add_rect,
+                *args, **kwargs)
+
+    def fitness(self, *args, **kwargs):
+        return self._checked(super(CheckedGuillotine, self).fitness,
+                *args, **kwargs)
+
+
+class TestPackerConcurrent(TestCase):
+
+    def test_single_thread(self):
+        # Same packing as the online packers when used by one thread
+        rects = random_rects(1, 300)
+        classes = [(threaded.PackerConcurrentBFF, packer.PackerOnlineBFF),
+                (threaded.PackerConcurrentBBF, packer.PackerOnlineBBF)]
+        for (concurrent_class, online_class), saturation in \
+                itertools.product(classes, (None, (10, 10))):
+            expected = online_class(saturation=saturation)
+            p = concurrent_class(saturation=saturation)
+            for pk in (expected, p):
+                pk.add_bin(150, 150, count=float('inf'))
+                pk.add_bin(100, 100, count=2)
+                for r in rects:
+                    pk.add_rect(*r)
+            self.assertEqual(p.rect_list(), expected.rect_list())
+            self.assertEqual(len(p), len(expected))
+
+    def test_threads(self):
+        rects = random_rects(2, 2000)
+        for packer_class in (threaded.PackerConcurrentBFF, 
+                threaded.PackerConcurrentBBF):
+            p = packer_class(pack_algo=guillotine.GuillotineBssfSas, 
+                    saturation=(5, 5))
+            p.add_bin(200, 200, count=float('inf'))
+            p.add_bin(50, 50, count=3)
+            placements = {}
+
+            def add(chunk):
+                for r in chunk:
+                    placements[r[2]] = p._add_rect(*r)
+
+            threads = [threading.Thread(target=add, args=(rects[i::8],))
+                    for i in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            # Every rectangle placed once in the bin returned
+            self.assertEqual(sorted(r[5] for r in p.rect_list()), 
+                    list(range(2000)))
+            for rid, (pbin, rect) in placements.items():
+                self.assertEqual(rect.rid, rid)
+                self.assertTrue(rect in list(pbin))
+            p.validate_packing()
+            self.assertTrue(len([b for b in p if b.width == 50]) <= 3)
+
+    def test_bin_exclusive(self):
+        # A bin is never used by two threads at once, not even while the
+        # first rectangle is placed into a new bin.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for packer_class in (threaded.PackerConcurrentBFF, 
+                    threaded.PackerConcurrentBBF):
+                del CheckedGuillotine.overlaps[:]
+                p = packer_class(pack_algo=CheckedGuillotine)
+                p.add_bin(60, 60, count=float('inf'))
+                rects = random_rects(3, 400)
+
+                def add(chunk):
+                    for r in chunk:
+                        p.add_rect(*r)
+
+                threads = [threading.Thread(target=add, args=(rects[i::8],))
+                        for i in range(8)]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+
+                self.assertEqual(CheckedGuillotine.overlaps, [])
+                self.assertEqual(len(p.rect_list()), 400)
+                p.validate_packing()
+        finally:
+            sys.setswitchinterval(interval)
+
+    def test_sink(self):
+        closed = []
+        p = threaded.PackerConcurrentBFF(saturation=(10, 10), 
+                sink=closed.append)
+        p.add_bin(50, 50, count=float('inf'))
+        for _ in range(5):
+            p.add_rect(50, 45)
+        p.add_rect(20, 20)
+        self.assertEqual(len(closed), 5)
+        self.assertEqual(p.closed_count, 5)
+        self.assertEqual(p.rect_list(), [(5, 0, 0, 20, 20, None)])
+
+        p.flush()
+        self.assertEqual(len(closed), 6)
+        self.assertEqual(len(p), 0)
+        self.assertEqual(p._open, ())
+
+        # Closed bins aren't used again
+        p.add_rect(20, 20)
+        self.assertEqual(len(closed[-1]), 1)
+        self.assertEqual(len(p), 1)
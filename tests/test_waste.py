@@ -69,3 +69,23 @@ class TestWaste(TestCase):
             self.assertEqual(r, Rectangle(30, 40, 50, 50))
 
         self.assertEqual(len(w), 1)
+
+    def test_min_size(self):
+        # Sections where min_size doesn't fit are discarded
+        w = waste.WasteManager(min_size=(5, 10))
+        w.add_waste(0, 0, 100, 4)
+        w.add_waste(0, 10, 10, 5)
+        self.assertEqual(w._sections, [Rectangle(0, 10, 10, 5)])
+
+        # but only after merging them
+        w.add_waste(0, 15, 10, 5)
+        self.assertEqual(w._sections, [Rectangle(0, 10, 10, 10)])
+
+        # and the leftovers after placing a rectangle too
+        self.assertEqual(w.add_rect(8, 8), Rectangle(0, 10, 8, 8))
+        self.assertEqual(w._sections, [])
+
+        # Without rotation only the original orientation is valid
+        w = waste.WasteManager(rot=False, min_size=(5, 10))
+        w.add_waste(0, 10, 10, 5)
+        self.assertEqual(w._sections, [])